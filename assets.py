@@ -0,0 +1,378 @@
+"""
+Static asset build: vendored libraries, optimized images and fingerprinted files.
+
+    python assets.py build              download vendored libraries (once) and rebuild static/dist
+    python assets.py build --refresh    download the vendored libraries again
+    python assets.py build --offline    rebuild from what is already on disk
+
+The build
+  * downloads the third-party CSS/JS the templates used to load from public CDNs
+    (VENDOR, pinned versions) into static/vendor/, together with the fonts and
+    images their stylesheets reference;
+  * recompresses images under a size cap and adds WebP and AVIF variants (needs
+    Pillow; AVIF needs a Pillow build with AVIF support);
+  * minifies stylesheets and scripts that are not already minified (scripts need
+    the rjsmin package);
+  * copies everything to static/dist/ under content-hashed names, with .gz and .br
+    (needs the brotli package) next to files that compress, and writes
+    static/dist/manifest.json.
+
+main_app rewrites url_for('static', ...) to the hashed names in the manifest and
+serves those files with a far-future immutable Cache-Control, choosing the
+precompressed or WebP/AVIF variant the browser accepts. Without a build the app
+serves static/ as before and vendor_url() falls back to the CDN. The manifest is
+read at startup, so restart the server after a build.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import tempfile
+import urllib.parse
+import urllib.request
+
+try:
+    from PIL import Image  # optional, only needed to recompress images
+except ImportError:
+    Image = None
+
+try:
+    import brotli  # optional, only needed for .br files
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin  # optional, only needed to minify scripts
+except ImportError:
+    rjsmin = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = 'dist'
+VENDOR_DIR = 'vendor'
+MANIFEST_FILE = 'manifest.json'
+
+# name under static/vendor/ -> pinned CDN URL (also the fallback before the first build)
+VENDOR = {
+    'bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css',
+    'bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js',
+    'jquery.min.js': 'https://cdn.jsdelivr.net/npm/jquery@3.7.1/dist/jquery.min.js',
+    'select2.min.css': 'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/css/select2.min.css',
+    'select2.min.js': 'https://cdn.jsdelivr.net/npm/select2@4.1.0-rc.0/dist/js/select2.min.js',
+    'lucide.min.js': 'https://cdn.jsdelivr.net/npm/lucide@0.468.0/dist/umd/lucide.min.js',
+    'chart.umd.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.2/dist/chart.umd.min.js',
+    'fontawesome.min.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.1/css/all.min.css',
+    'tailwind-play.js': 'https://cdn.tailwindcss.com/3.4.16',
+    'inter.css': 'https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap',
+    'poppins.css': 'https://fonts.googleapis.com/css2?family=Poppins:wght@200;300;400;500;600;700&display=swap',
+}
+
+# Google Fonts picks the font format from the User-Agent; this one gets woff2
+DOWNLOAD_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+IMAGE_MAX_SIZE = (1920, 1920)  # larger images are scaled down to fit
+IMAGE_QUALITY = {'JPEG': 82, 'WEBP': 80, 'AVIF': 60}
+IMAGE_VARIANTS = (('image/avif', '.avif', 'AVIF'), ('image/webp', '.webp', 'WEBP'))
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.ttf', '.eot', '.otf', '.map', '.html'}
+MIN_COMPRESS_SIZE = 512
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+CSS_COMMENT_RE = re.compile(r'/\*(?!!).*?\*/', re.S)  # keeps /*! license */ comments
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCTUATION_RE = re.compile(r'\s*([{};:,>])\s*')
+
+
+# --- Downloading ---
+
+def download(url):
+    request = urllib.request.Request(url, headers={'User-Agent': DOWNLOAD_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.read()
+
+
+def is_external(ref):
+    return ref.startswith(('data:', '#')) or '://' in ref or ref.startswith('//')
+
+
+def vendor_library(static_dir, name, url, log=print):
+    """
+    Downloads one library to static/vendor/<name>. Files a stylesheet references
+    (fonts, images) are downloaded to static/vendor/<library>-files/ and the stylesheet
+    is rewritten to point at them.
+    """
+    body = download(url)
+    vendor_dir = os.path.join(static_dir, VENDOR_DIR)
+    if name.endswith('.css'):
+        files_dir = name.split('.', 1)[0] + '-files'
+        fetched = {}
+
+        def localize(match):
+            ref = match.group(2).strip()
+            if ref.startswith('data:') or ref.startswith('#'):
+                return match.group(0)
+            source = urllib.parse.urljoin(url, ref)
+            if source not in fetched:
+                local_name = posixpath.basename(urllib.parse.urlsplit(source).path)
+                target = posixpath.join(files_dir, local_name)
+                if target in fetched.values():
+                    local_name = hashlib.sha1(source.encode()).hexdigest()[:8] + '-' + local_name
+                    target = posixpath.join(files_dir, local_name)
+                path = os.path.join(vendor_dir, *target.split('/'))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(download(source))
+                fetched[source] = target
+            return f'url({fetched[source]})'
+
+        body = CSS_URL_RE.sub(localize, body.decode('utf-8')).encode('utf-8')
+        log(f'  {name}: {len(fetched)} referenced files')
+    os.makedirs(vendor_dir, exist_ok=True)
+    with open(os.path.join(vendor_dir, name), 'wb') as f:
+        f.write(body)
+    log(f'  {name}: {len(body)} bytes from {url}')
+
+
+def vendor_all(static_dir, refresh=False, log=print):
+    for name, url in VENDOR.items():
+        if refresh or not os.path.exists(os.path.join(static_dir, VENDOR_DIR, name)):
+            vendor_library(static_dir, name, url, log)
+
+
+# --- Processing ---
+
+def minify_css(css):
+    """Conservative CSS minifier: drops comments and insignificant whitespace."""
+    css = CSS_COMMENT_RE.sub('', css)
+    css = CSS_SPACE_RE.sub(' ', css)
+    css = CSS_PUNCTUATION_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def optimize_image(path):
+    """
+    Returns (recompressed bytes or None if not smaller, {mimetype: variant bytes}).
+    Without Pillow the image is used as it is.
+    """
+    if Image is None:
+        return None, {}
+    with open(path, 'rb') as f:
+        original = f.read()
+    with Image.open(path) as image:
+        image.load()
+        image_format = image.format
+        if image.width > IMAGE_MAX_SIZE[0] or image.height > IMAGE_MAX_SIZE[1]:
+            image.thumbnail(IMAGE_MAX_SIZE, Image.LANCZOS)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        def encode(fmt):
+            buffer = io.BytesIO()
+            options = {'optimize': True, 'quality': IMAGE_QUALITY[fmt], 'progressive': True} if fmt == 'JPEG' \
+                else {'optimize': True} if fmt == 'PNG' else {'quality': IMAGE_QUALITY[fmt]}
+            image.save(buffer, fmt, **options)
+            return buffer.getvalue()
+
+        recompressed = encode(image_format) if image_format in ('JPEG', 'PNG') else None
+        baseline = len(recompressed) if recompressed and len(recompressed) < len(original) else len(original)
+        variants = {}
+        for mimetype, _, fmt in IMAGE_VARIANTS:
+            try:
+                data = encode(fmt)
+            except (KeyError, OSError):
+                continue  # this Pillow build has no encoder for the format
+            if len(data) < baseline:
+                variants[mimetype] = data
+    if recompressed is not None and len(recompressed) >= len(original):
+        recompressed = None
+    return recompressed, variants
+
+
+def fingerprinted_name(logical, content):
+    stem, ext = posixpath.splitext(logical)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+def rewrite_css_urls(css, css_logical, files):
+    """Points url() references at the fingerprinted names of the files they refer to."""
+    css_dir = posixpath.dirname(css_logical)
+    hashed_dir = posixpath.dirname(files[css_logical]) if css_logical in files else css_dir
+
+    def replace(match):
+        ref = match.group(2).strip()
+        if is_external(ref):
+            return match.group(0)
+        ref, hash_sep, fragment = ref.partition('#')
+        path = ref.partition('?')[0]  # the hashed name replaces any cache-busting query
+        target = posixpath.normpath(posixpath.join(css_dir, path))
+        if target not in files:
+            return match.group(0)
+        new_ref = posixpath.relpath(files[target], hashed_dir)
+        return f'url({new_ref}{hash_sep}{fragment})'
+
+    return CSS_URL_RE.sub(replace, css)
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def precompress(path, data):
+    """Writes .br and .gz next to `path` where they are smaller; returns the encodings written."""
+    written = []
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br':
+            if brotli is None:
+                continue
+            compressed = brotli.compress(data, quality=11)
+        else:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data) * 0.9:
+            write_file(path + suffix, compressed)
+            written.append(encoding)
+    return written
+
+
+def source_files(static_dir):
+    """Logical paths (relative to static/, with forward slashes) of every file except the build output."""
+    for root, dirs, filenames in os.walk(static_dir):
+        # skip the build output and unfinished builds (.dist-*)
+        dirs[:] = [d for d in dirs if not d.startswith('.') and not (root == static_dir and d == DIST_DIR)]
+        for filename in filenames:
+            if not filename.startswith('.'):
+                yield os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, '/')
+
+
+def build(static_dir=STATIC_DIR, log=print):
+    """Rebuilds static/dist from static/ and returns the manifest."""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    build_dir = tempfile.mkdtemp(dir=static_dir, prefix='.dist-')
+    files, encodings, images = {}, {}, {}
+    logicals = sorted(source_files(static_dir))
+    stylesheets = [logical for logical in logicals if logical.endswith('.css')]
+
+    # Stylesheets last, so the files they reference already have their hashed names
+    for logical in [l for l in logicals if not l.endswith('.css')] + stylesheets:
+        source_path = os.path.join(static_dir, *logical.split('/'))
+        with open(source_path, 'rb') as f:
+            data = f.read()
+        ext = posixpath.splitext(logical)[1].lower()
+        variants = {}
+        if ext in IMAGE_EXTENSIONS:
+            recompressed, variants = optimize_image(source_path)
+            if recompressed is not None:
+                log(f'  {logical}: {len(data)} -> {len(recompressed)} bytes')
+                data = recompressed
+        elif ext == '.css':
+            css = data.decode('utf-8')
+            if not logical.endswith('.min.css'):
+                css = minify_css(css)
+            data = rewrite_css_urls(css, logical, files).encode('utf-8')
+        elif ext == '.js' and not logical.endswith('.min.js') and rjsmin is not None:
+            data = rjsmin.jsmin(data.decode('utf-8'), keep_bang_comments=True).encode('utf-8')
+
+        hashed = fingerprinted_name(logical, data)
+        out_path = os.path.join(build_dir, *hashed.split('/'))
+        write_file(out_path, data)
+        files[logical] = hashed
+        if ext in COMPRESSIBLE_EXTENSIONS and len(data) >= MIN_COMPRESS_SIZE:
+            encodings[hashed] = precompress(out_path, data)
+        for mimetype, suffix, _ in IMAGE_VARIANTS:
+            if mimetype in variants:
+                variant_name = hashed + suffix
+                write_file(os.path.join(build_dir, *variant_name.split('/')), variants[mimetype])
+                images.setdefault(hashed, {})[mimetype] = variant_name
+                log(f'  {logical}: {mimetype} variant {len(variants[mimetype])} bytes')
+
+    manifest = {'files': files, 'encodings': {k: v for k, v in encodings.items() if v}, 'images': images}
+    with open(os.path.join(build_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.replace(build_dir, dist_dir)
+    return manifest
+
+
+# --- Runtime ---
+
+class AssetManifest:
+    """The build's manifest as the app uses it: logical name -> fingerprinted name, plus variants."""
+
+    def __init__(self, static_dir=None, manifest_path=None):
+        self.files = {}
+        self.encodings = {}
+        self.images = {}
+        self.fingerprinted = set()
+        self.vendored = set()
+        self.version = ''
+        if static_dir:
+            self.load(static_dir, manifest_path)
+
+    def load(self, static_dir, manifest_path=None):
+        manifest_path = manifest_path or os.path.join(static_dir, DIST_DIR, MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'rb') as f:
+                raw = f.read()
+            manifest = json.loads(raw)
+        except (OSError, ValueError):
+            raw, manifest = b'', {}
+        self.version = hashlib.sha1(raw).hexdigest()[:12]  # changes with every build that changes a file
+        self.files = {logical: posixpath.join(DIST_DIR, hashed) for logical, hashed in manifest.get('files', {}).items()}
+        self.encodings = {posixpath.join(DIST_DIR, k): v for k, v in manifest.get('encodings', {}).items()}
+        self.images = {posixpath.join(DIST_DIR, k): {mimetype: posixpath.join(DIST_DIR, name) for mimetype, name in v.items()}
+                       for k, v in manifest.get('images', {}).items()}
+        self.fingerprinted = set(self.files.values())
+        self.vendored = {name for name in VENDOR if os.path.exists(os.path.join(static_dir, VENDOR_DIR, name))}
+
+    def lookup(self, filename):
+        return self.files.get(filename)
+
+    def is_fingerprinted(self, filename):
+        return filename in self.fingerprinted
+
+    def variant(self, filename, accepted_mimetypes, accepted_encodings):
+        """
+        Returns (file to send, its mimetype or None to guess from `filename`, content
+        encoding or None, response varies on) for a fingerprinted file.
+        """
+        for mimetype, name in self.images.get(filename, {}).items():
+            if mimetype in accepted_mimetypes:
+                return name, mimetype, None, ('Accept',)
+        vary = ('Accept',) if filename in self.images else ()
+        available = self.encodings.get(filename, ())
+        for encoding, suffix in ENCODINGS:
+            if encoding in available and encoding in accepted_encodings:
+                return filename + suffix, None, encoding, vary + ('Accept-Encoding',)
+        return filename, None, None, vary + (('Accept-Encoding',) if available else ())
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] != 'build' or any(arg not in ('--refresh', '--offline') for arg in argv[1:]):
+        print(__doc__)
+        return 2
+    if '--offline' not in argv:
+        print('Vendoring libraries')
+        vendor_all(STATIC_DIR, refresh='--refresh' in argv)
+    if Image is None:
+        print('Pillow is not installed: images are copied without recompression or WebP/AVIF variants')
+    if brotli is None:
+        print('brotli is not installed: only gzip files are precompressed')
+    if rjsmin is None:
+        print('rjsmin is not installed: scripts are copied without minification')
+    print('Building static/dist')
+    manifest = build(STATIC_DIR)
+    print(f"{len(manifest['files'])} files fingerprinted, {len(manifest['encodings'])} precompressed, "
+          f"{len(manifest['images'])} images with WebP/AVIF variants")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Content-addressed storage for ticket attachments.
+
+Uploads are hashed (SHA-256) while they are being written to a temporary file and
+then moved to objects/<aa>/<bb>/<sha256> under the upload folder. A file whose
+content is already stored is not written twice; the ticket row keeps the original
+filename alongside the hash and size.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+CHUNK_SIZE = 64 * 1024
+
+StoredAttachment = namedtuple('StoredAttachment', ['path', 'sha256', 'size'])
+
+
+class HashingSpoolFile:
+    """
+    A temporary file under the upload folder that hashes everything written to it.
+    Werkzeug's multipart parser writes uploads straight into it (see
+    AttachmentRequest in main_app), so the upload is hashed as it streams in and
+    never has to be copied or re-read. The file is deleted on close() unless it was
+    moved into the store.
+    """
+
+    def __init__(self, tmp_dir):
+        os.makedirs(tmp_dir, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=tmp_dir, prefix='upload-', delete=False)
+        self.name = self._file.name
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self._stored = False
+
+    def write(self, data):
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self._stored and os.path.exists(self.name):
+            os.remove(self.name)
+
+    def move_to(self, dest):
+        """Atomically moves the finished upload to `dest` (same filesystem)."""
+        self._file.close()
+        os.replace(self.name, dest)
+        self._stored = True
+
+
+def object_path(root, sha256):
+    """Returns the sharded path of the object with the given hash."""
+    return os.path.join(root, 'objects', sha256[:2], sha256[2:4], sha256)
+
+
+def store(file_storage, root):
+    """
+    Stores an uploaded werkzeug FileStorage in the content-addressed store under
+    `root` and returns a StoredAttachment. Identical content is stored only once.
+    """
+    spool = file_storage.stream
+    if not isinstance(spool, HashingSpoolFile):
+        # Upload was not parsed through AttachmentRequest; hash it while copying in chunks
+        spool = HashingSpoolFile(os.path.join(root, 'tmp'))
+        shutil.copyfileobj(file_storage.stream, spool, CHUNK_SIZE)
+    spool.flush()
+
+    sha256 = spool.hexdigest()
+    size = spool.size
+    dest = object_path(root, sha256)
+    if os.path.exists(dest):
+        spool.close()
+    else:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        spool.move_to(dest)
+    return StoredAttachment(dest, sha256, size)
@@ -0,0 +1,5 @@
+"""
+Benchmark suite: seed.py fills a local database with synthetic data and load.py
+replays request mixes against a running server and reports latency percentiles.
+See the docstrings of both modules for usage.
+"""
@@ -0,0 +1,302 @@
+"""
+Load driver: replays request mixes against a running server and reports throughput
+and p50/p95/p99 latency per endpoint.
+
+    python -m bench.load --scenario mixed --concurrency 50 --duration 60
+    python -m bench.load --scenario dashboard --save-baseline bench/baselines/dashboard.json
+    python -m bench.load --scenario dashboard --compare bench/baselines/dashboard.json
+
+Virtual users log in as the users created by bench.seed (bench_<role>_<n>, all with
+the same --password), then repeatedly pick a weighted action from the scenario.
+Scenarios:
+    login_storm    fresh sessions logging in as fast as possible
+    checkin_rush   consultants checking in once, then opening their attendance page and
+                   checking out once
+    dashboard      dashboard refreshes: page, summary, ticket pages and searches
+    bulk_assign    admins opening the assignment page and bulk-assigning tickets
+    mixed          all of the above plus the leave and holiday listings
+
+--compare exits with status 1 if any endpoint's p95 got worse by more than
+--tolerance percent, so the driver can gate a CI job.
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from bench.seed import WORDS, user_name
+
+ROLE_COUNTS = {'admin': 40, 'consultant': 1160, 'customer': 800}  # what bench.seed makes for 2000 users
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Measures the request itself, not the page a redirect points to."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Client:
+    """One virtual user: a cookie-carrying HTTP session that records every request it makes."""
+
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def request(self, name, path, data=None, json_body=None, expected=()):
+        """
+        Sends one request and records it under `name`; returns (status, headers, body)
+        or None on failure. Error statuses listed in `expected` are not counted as errors.
+        """
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            data = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                status, response_headers, body = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as err:
+            status, response_headers, body = err.code, err.headers, err.read()
+        except (urllib.error.URLError, OSError):
+            self.recorder.record(name, time.perf_counter() - started, ok=False)
+            return None
+        self.recorder.record(name, time.perf_counter() - started, ok=status < 400 or status in expected)
+        return status, response_headers, body
+
+    def login(self, login_name, password, name='login'):
+        result = self.request(name, '/login', data={'user_name': login_name, 'password': password})
+        # A successful login redirects to the dashboard; a failed one re-renders the form
+        return result is not None and result[0] == 302 and 'dashboard' in result[1].get('Location', '')
+
+
+class Recorder:
+    """Thread-safe latency samples and error counts per endpoint name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, name, seconds, ok=True):
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(recorder, elapsed):
+    results = {}
+    for name, samples in sorted(recorder.samples.items()):
+        samples = sorted(samples)
+        results[name] = {
+            'count': len(samples),
+            'errors': recorder.errors.get(name, 0),
+            'rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(samples, 50) * 1000, 2),
+            'p95_ms': round(percentile(samples, 95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 99) * 1000, 2),
+        }
+    return results
+
+
+# --- Scenario actions: each takes (client, state) and makes one or more requests ---
+
+def action_login(client, state):
+    fresh = Client(client.base_url, client.recorder, client.timeout)
+    fresh.login(user_name(state.role, state.rng.randint(1, state.role_count)), state.password)
+
+
+def action_check_in(client, state):
+    """Checks in once per virtual user; afterwards the action opens the attendance page instead."""
+    if state.checked_in:
+        return action_attendance(client, state)
+    # 400 'Already checked in today': the seeded user checked in during an earlier run
+    client.request('attendance.check_in', '/attendance/check_in', data={}, expected=(400,))
+    state.checked_in = True
+
+
+def action_check_out(client, state):
+    """Checks out once, after checking in; otherwise opens the attendance page."""
+    if not state.checked_in or state.checked_out:
+        return action_attendance(client, state)
+    client.request('attendance.check_out', '/attendance/check_out', data={}, expected=(400,))
+    state.checked_out = True
+
+
+def action_attendance(client, state):
+    client.request('attendance', '/attendance')
+
+
+def action_dashboard(client, state):
+    client.request('tickets.dashboard', '/tickets/dashboard')
+    client.request('tickets.api_summary', '/tickets/api/summary')
+    client.request('tickets.api_tickets', '/tickets/api/tickets?' + urllib.parse.urlencode(
+        {'status': state.rng.choice(['Open', 'In_Progress', 'Confirmed', 'Cancelled'])}))
+
+
+def action_search(client, state):
+    query = ' '.join(state.rng.sample(WORDS, state.rng.randint(1, 2)))
+    client.request('tickets.search', '/tickets/api/search?' + urllib.parse.urlencode({'q': query}))
+
+
+def action_bulk_assign(client, state):
+    result = client.request('tickets.assign_tickets', '/tickets/assign_tickets')
+    if result is None or result[0] != 200:
+        return
+    page = result[2].decode('utf-8', 'replace')
+    ticket_ids = re.findall(r'class="form-check-input ticket-select" type="checkbox" value="(\d+)"', page)
+    bulk_select = re.search(r'id="bulkAssigneeSelect".*?</select>', page, re.S)
+    assignee_ids = re.findall(r'<option value="(\d+)"', bulk_select.group(0)) if bulk_select else []
+    if not ticket_ids or not assignee_ids:
+        return
+    client.request('tickets.bulk_assign', '/tickets/bulk_assign', json_body={
+        'ticket_ids': state.rng.sample(ticket_ids, min(len(ticket_ids), state.rng.randint(5, 25))),
+        'assignee_ids': state.rng.sample(assignee_ids, min(len(assignee_ids), state.rng.randint(1, 2))),
+    })
+
+
+def action_leave_list(client, state):
+    client.request('leaves.leave_list', '/leaves/list')
+
+
+def action_holiday_list(client, state):
+    client.request('holidays.holiday_list', '/holidays/list')
+
+
+# role the virtual users log in as, and weighted actions
+SCENARIOS = {
+    'login_storm': ('consultant', [(action_login, 1)]),
+    'checkin_rush': ('consultant', [(action_check_in, 6), (action_attendance, 3), (action_check_out, 1)]),
+    'dashboard': ('consultant', [(action_dashboard, 4), (action_search, 1)]),
+    'bulk_assign': ('admin', [(action_bulk_assign, 1)]),
+    'mixed': ('admin', [(action_dashboard, 30), (action_search, 10), (action_check_in, 15), (action_attendance, 10),
+                        (action_login, 10), (action_bulk_assign, 5), (action_leave_list, 10),
+                        (action_holiday_list, 10)]),
+}
+
+
+class VirtualUserState:
+    def __init__(self, role, role_count, password, seed):
+        self.role = role
+        self.role_count = role_count
+        self.password = password
+        self.rng = random.Random(seed)
+        self.checked_in = False   # check-in and check-out succeed once per user per day
+        self.checked_out = False
+
+
+def run_virtual_user(args, recorder, role, actions, index, stop_at):
+    state = VirtualUserState(role, args.role_count or ROLE_COUNTS[role], args.password, args.seed + index)
+    client = Client(args.base_url, recorder, args.timeout)
+    if not client.login(user_name(role, index % state.role_count + 1), args.password):
+        print(f'virtual user {index}: login failed, is the database seeded with bench.seed?', file=sys.stderr)
+        return
+    functions, weights = zip(*actions)
+    while time.monotonic() < stop_at:
+        state.rng.choices(functions, weights)[0](client, state)
+        if args.think_time:
+            time.sleep(state.rng.expovariate(1 / args.think_time))
+
+
+def print_report(results, elapsed, baseline=None):
+    header = f"{'endpoint':<28}{'count':>8}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    print('-' * len(header))
+    for name, row in results.items():
+        line = (f"{name:<28}{row['count']:>8}{row['errors']:>8}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+        if baseline:
+            base = baseline.get(name)
+            line += f"{percent_change(base['p95_ms'], row['p95_ms']):>+12.1f}%" if base else f"{'new':>13}"
+        print(line)
+    total = sum(row['count'] for row in results.values())
+    print(f'\n{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)')
+
+
+def percent_change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def regressions(results, baseline, tolerance):
+    """Endpoints whose p95 latency grew by more than `tolerance` percent over the baseline."""
+    return [name for name, row in results.items()
+            if name in baseline and percent_change(baseline[name]['p95_ms'], row['p95_ms']) > tolerance]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='mixed')
+    parser.add_argument('--concurrency', type=int, default=20, help='virtual users running at once')
+    parser.add_argument('--duration', type=float, default=60, help='seconds to run')
+    parser.add_argument('--think-time', type=float, default=0, help='mean seconds a virtual user pauses between actions')
+    parser.add_argument('--password', default='bench', help='password given to bench.seed')
+    parser.add_argument('--role-count', type=int, help='generated users per role (default: what bench.seed makes)')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save-baseline', metavar='FILE', help='write the results to FILE for later --compare')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results with a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=10, help='allowed p95 regression in percent')
+    args = parser.parse_args(argv)
+
+    role, actions = SCENARIOS[args.scenario]
+    recorder = Recorder()
+    started = time.monotonic()
+    stop_at = started + args.duration
+    threads = [threading.Thread(target=run_virtual_user, args=(args, recorder, role, actions, i, stop_at), daemon=True)
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    results = summarize(recorder, elapsed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print(f'scenario={args.scenario} concurrency={args.concurrency} duration={args.duration:g}s\n')
+    print_report(results, elapsed, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or '.', exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'scenario': args.scenario, 'concurrency': args.concurrency, 'duration': args.duration,
+                       'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, indent=2)
+        print(f'\nBaseline written to {args.save_baseline}')
+
+    if baseline:
+        worse = regressions(results, baseline, args.tolerance)
+        if worse:
+            print(f"\np95 regressed by more than {args.tolerance:g}%: {', '.join(worse)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Seeds a local database with synthetic data for benchmarking.
+
+    python -m bench.seed --users 2000 --tickets 100000 --attendance 1000000
+    python -m bench.seed --purge
+
+Connection settings come from the application config (load_config(), so
+TICKETING_DB_* environment variables apply). Every generated user is named
+bench_<role>_<n> and shares the --password, which is what bench.load logs in with.
+Generated rows can be removed again with --purge. Needs an up-to-date schema (python migrate.py up).
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+from werkzeug.security import generate_password_hash
+
+from main_app import INSERT_USER_SQL, TICKET_NUMBER_SEQUENCE, load_config
+
+ROLE_SHARES = (('admin', 'Admin', 0.02), ('consultant', 'Consultant', 0.58), ('customer', 'Customer', 0.40))
+POSITIONS = ('Manager', 'Senior', 'Junior', 'Intern')
+MODULES = ('Billing', 'Support', 'Sales')
+STATUSES = (('Open', 0.25), ('Assigned', 0.15), ('In_Progress', 0.20), ('Confirmed', 0.30), ('Cancelled', 0.10))
+PRIORITIES = ('High', 'Medium', 'Low')
+FORM_TYPES = ('Incident', 'Request', 'Problem')
+LEAVE_TYPES = ('Casual', 'Sick', 'Earned')
+WORDS = ('invoice printer login vpn password report export timeout error sync email upload '
+         'payment server slow crash screen access update install license backup network '
+         'database order customer delivery approval mobile portal certificate').split()
+BENCH_CUSTOMER_PREFIX = 'bench_customer_'
+BENCH_HOLIDAY_COUNTRY = 'Benchland'
+BENCH_LEAVE_REMARK = 'bench'
+
+
+def user_name(role, n):
+    """The login of the n-th generated user of a role ('admin', 'consultant' or 'customer')."""
+    return f'bench_{role}_{n}'
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def insert_batches(conn, sql, rows, batch_size, label):
+    """Inserts an iterable of rows with executemany, committing after every batch."""
+    cursor = conn.cursor()
+    batch, total, started = [], 0, time.monotonic()
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(sql, batch)
+            conn.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        conn.commit()
+        total += len(batch)
+    cursor.close()
+    print(f'{label}: {total} rows in {time.monotonic() - started:.1f}s')
+
+
+def seed_users(conn, rng, count, password, batch_size):
+    hashed = generate_password_hash(password)  # one hash for all: hashing 1000s would dominate seeding
+    today = date.today()
+
+    def rows():
+        for role, user_type, share in ROLE_SHARES:
+            for n in range(1, max(1, int(count * share)) + 1):
+                yield {
+                    'user_type': user_type, 'user_name': user_name(role, n), 'password': hashed,
+                    'consultant_type': 'Functional' if user_type == 'Consultant' else None,
+                    'reporting_manager': None, 'alternate_mobile': None, 'worksnap_credentials': None,
+                    'status': 'Active', 'timesheet_notification': None,
+                    'name': f'Bench {role.title()} {n}', 'mobile': f'9{rng.randrange(10**9):09d}',
+                    'office_email': f'{user_name(role, n)}@bench.example',
+                    'joining_date': today - timedelta(days=rng.randrange(3000)),
+                    'position': rng.choice(POSITIONS),
+                    'date_of_birth': today - timedelta(days=rng.randrange(8000, 20000)),
+                    'anniversary_date': None, 'sap_server_credentials': None,
+                    'allow_backdated_timesheet': None,
+                }
+
+    insert_batches(conn, INSERT_USER_SQL, rows(), batch_size, 'users')
+
+
+def bench_users(conn, user_type):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, name FROM users WHERE user_name LIKE 'bench\\_%%' AND user_type = %s ORDER BY id",
+                   (user_type,))
+    users = cursor.fetchall()
+    cursor.close()
+    return users
+
+
+def seed_tickets(conn, rng, count, batch_size):
+    customers = bench_users(conn, 'Customer')
+    assignees = bench_users(conn, 'Consultant') + bench_users(conn, 'Admin')
+    if not customers or not assignees:
+        raise SystemExit('Seed users first: tickets need bench customers and consultants.')
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(CAST(ticket_number AS UNSIGNED)), 0) FROM tickets")
+    first_number = cursor.fetchone()[0] + 1
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM tickets")
+    first_id = cursor.fetchone()[0] + 1
+    cursor.close()
+
+    statuses, weights = zip(*STATUSES)
+    now = datetime.now()
+    assignments = []
+
+    def rows():
+        for offset in range(count):
+            status = rng.choices(statuses, weights)[0]
+            assigned = None
+            if status != 'Open':
+                picked = rng.sample(assignees, rng.choice((1, 1, 1, 2)))
+                assigned = ', '.join(name for _, name in picked)
+                assignments.extend((first_id + offset, user_id) for user_id, _ in picked)
+            yield (
+                first_id + offset, str(first_number + offset), str(rng.choice(customers)[0]),
+                rng.choice(MODULES), status, rng.choice(FORM_TYPES), rng.choice(PRIORITIES),
+                sentence(rng, rng.randint(3, 8)).capitalize(), 'bench', rng.randint(1, 40),
+                sentence(rng, rng.randint(20, 80)), assigned,
+                now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+            )
+
+    insert_batches(conn, """
+        INSERT INTO tickets (id, ticket_number, customer, module, status, form_type, priority, subject,
+                             task_given_by, approved_hours, description, assigned_to_user_name, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, rows(), batch_size, 'tickets')
+    insert_batches(conn, "INSERT IGNORE INTO ticket_assignees (ticket_id, user_id) VALUES (%s, %s)",
+                   assignments, batch_size, 'ticket_assignees')
+
+    # Continue the ticket number sequence after the generated tickets
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO counters (name, value) VALUES (%s, %s) ON DUPLICATE KEY UPDATE value = GREATEST(value, VALUES(value))",
+        (TICKET_NUMBER_SEQUENCE, first_number + count - 1)
+    )
+    conn.commit()
+    cursor.close()
+
+
+def seed_attendance(conn, rng, count, batch_size):
+    users = bench_users(conn, 'Consultant') + bench_users(conn, 'Admin')
+    if not users:
+        raise SystemExit('Seed users first: attendance needs bench consultants.')
+    days = -(-count // len(users))  # one row per user per weekday, going back as far as needed
+    workdays = []
+    day = date.today() - timedelta(days=1)
+    while len(workdays) < days:
+        if day.weekday() < 5:
+            workdays.append(day)
+        day -= timedelta(days=1)
+
+    def rows():
+        produced = 0
+        for workday in workdays:
+            for user_id, _ in users:
+                if produced >= count:
+                    return
+                check_in = datetime.combine(workday, datetime.min.time()) + timedelta(
+                    hours=8, minutes=rng.randrange(150))
+                check_out = check_in + timedelta(hours=8, minutes=rng.randrange(120)) if rng.random() < 0.97 else None
+                produced += 1
+                yield (user_id, workday, check_in, check_out)
+
+    insert_batches(conn, "INSERT IGNORE INTO attendance (user_id, date, check_in, check_out) VALUES (%s, %s, %s, %s)",
+                   rows(), batch_size, 'attendance')
+
+    # Rebuild the monthly rollups of the generated users (same rules as migrations/0006 and 0011)
+    cursor = conn.cursor()
+    cursor.execute("""
+        REPLACE INTO attendance_monthly (user_id, month, days_present, days_checked_out, late_days, worked_seconds,
+                                         weekday_days)
+        SELECT a.user_id, DATE_FORMAT(a.date, '%Y-%m-01'), SUM(a.check_in IS NOT NULL),
+               SUM(a.check_in IS NOT NULL AND a.check_out IS NOT NULL), SUM(TIME(a.check_in) > '09:30:00'),
+               COALESCE(SUM(TIMESTAMPDIFF(SECOND, a.check_in, a.check_out)), 0),
+               SUM(a.check_in IS NOT NULL AND WEEKDAY(a.date) < 5)
+        FROM attendance a JOIN users u ON u.id = a.user_id
+        WHERE u.user_name LIKE 'bench\\_%'
+        GROUP BY a.user_id, DATE_FORMAT(a.date, '%Y-%m-01')
+    """)
+    conn.commit()
+    cursor.close()
+
+
+def seed_holidays(conn, rng, count, batch_size):
+    start = date.today() - timedelta(days=count // 2)
+    rows = ((BENCH_HOLIDAY_COUNTRY, f'Bench Holiday {n}', start + timedelta(days=n)) for n in range(count))
+    insert_batches(conn, "INSERT INTO holidays (country, name, holiday_date) VALUES (%s, %s, %s)",
+                   rows, batch_size, 'holidays')
+
+
+def seed_leaves(conn, rng, count, batch_size):
+    consultants = bench_users(conn, 'Consultant')
+    if not consultants:
+        raise SystemExit('Seed users first: leave requests need bench consultants.')
+    today = date.today()
+    rows = ((user_id, name, today - timedelta(days=rng.randrange(-60, 730)), rng.choice(LEAVE_TYPES), BENCH_LEAVE_REMARK)
+            for user_id, name in (rng.choice(consultants) for _ in range(count)))
+    insert_batches(conn, "INSERT INTO leave_requests (user_id, consultant_name, leave_date, leave_type, remarks) "
+                         "VALUES (%s, %s, %s, %s, %s)", rows, batch_size, 'leave_requests')
+
+
+def purge(conn):
+    """Deletes everything this script generated."""
+    cursor = conn.cursor()
+    statements = (
+        "DELETE ta FROM ticket_assignees ta JOIN users u ON u.id = ta.user_id WHERE u.user_name LIKE 'bench\\_%'",
+        "DELETE t FROM tickets t JOIN users u ON t.customer = CAST(u.id AS CHAR) "
+        "WHERE u.user_name LIKE 'bench\\_customer\\_%'",
+        "DELETE a FROM attendance a JOIN users u ON u.id = a.user_id WHERE u.user_name LIKE 'bench\\_%'",
+        "DELETE m FROM attendance_monthly m JOIN users u ON u.id = m.user_id WHERE u.user_name LIKE 'bench\\_%'",
+        f"DELETE FROM leave_requests WHERE remarks = '{BENCH_LEAVE_REMARK}'",
+        f"DELETE FROM holidays WHERE country = '{BENCH_HOLIDAY_COUNTRY}'",
+        "DELETE FROM users WHERE user_name LIKE 'bench\\_%'",
+    )
+    for statement in statements:
+        cursor.execute(statement)
+        print(f'{cursor.rowcount:>9} rows: {statement.split(" WHERE")[0]}')
+        conn.commit()
+    cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tickets', type=int, default=100_000)
+    parser.add_argument('--attendance', type=int, default=1_000_000)
+    parser.add_argument('--holidays', type=int, default=2000)
+    parser.add_argument('--leaves', type=int, default=20_000)
+    parser.add_argument('--password', default='bench', help='password of every generated user')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1, help='random seed, for reproducible data')
+    parser.add_argument('--purge', action='store_true', help='delete previously generated data and exit')
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    conn = mysql.connector.connect(host=config['DB_HOST'], user=config['DB_USER'],
+                                   password=config['DB_PASSWORD'], database=config['DB_NAME'])
+    try:
+        if args.purge:
+            purge(conn)
+            return
+        rng = random.Random(args.seed)
+        if args.users:
+            seed_users(conn, rng, args.users, args.password, args.batch_size)
+        if args.tickets:
+            seed_tickets(conn, rng, args.tickets, args.batch_size)
+        if args.attendance:
+            seed_attendance(conn, rng, args.attendance, args.batch_size)
+        if args.holidays:
+            seed_holidays(conn, rng, args.holidays, args.batch_size)
+        if args.leaves:
+            seed_leaves(conn, rng, args.leaves, args.batch_size)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Content-negotiated gzip/brotli compression of dynamic responses.
+
+main_app runs compress_response() on every response. Which content types are
+compressed, and at what level, is configured per type; bodies below a size
+threshold are sent as they are. Streamed responses (generators such as the leave
+and holiday listings or the CSV exports) are compressed chunk by chunk and
+flushed regularly, so the browser still renders them progressively. Buffered
+bodies above a size limit are compressed in chunks while the server sends them,
+instead of all at once before the first byte goes out, but without the flushes.
+
+Files (send_file, the fingerprinted static assets, attachments) are left alone:
+they are either precompressed already or passed through to the front proxy.
+zlib and brotli release the GIL while compressing, so other request threads keep
+running meanwhile.
+"""
+import zlib
+
+try:
+    import brotli  # optional, adds Content-Encoding: br
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip')  # preferred first when the client rates them equally
+SKIP_STATUS = {204, 206, 304}
+CHUNK_SIZE = 64 * 1024
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def available_encodings():
+    return ENCODINGS if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings):
+    """Returns the best encoding the client accepts ('br' or 'gzip'), or None."""
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings[encoding]  # werkzeug Accept: 0 when not acceptable, honours '*'
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def make_compressor(encoding, levels):
+    """`levels` is the (gzip level, brotli quality) pair configured for the content type."""
+    gzip_level, brotli_quality = levels
+    return BrotliCompressor(brotli_quality) if encoding == 'br' else GzipCompressor(gzip_level)
+
+
+def compress_chunks(chunks, compressor, flush_size=None):
+    """
+    Compresses an iterable of byte strings. With `flush_size`, output is sync-flushed
+    at least every `flush_size` input bytes so a streamed page keeps arriving while it
+    is generated; without it, output is yielded as the compressor produces it, which
+    compresses best. The wrapped iterable is closed with the generator (it may hold
+    a request context).
+    """
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            output = compressor.compress(chunk)
+            pending += len(chunk)
+            if flush_size is not None and pending >= flush_size:
+                output += compressor.flush()
+                pending = 0
+            if output:
+                yield output
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def iter_slices(data, size=CHUNK_SIZE):
+    view = memoryview(data)
+    for start in range(0, len(data), size):
+        yield view[start:start + size].tobytes()
+
+
+def compress_response(response, accept_encodings, mimetypes, min_size, flush_size, buffer_limit):
+    """
+    Compresses `response` in place when its content type is listed in `mimetypes`
+    ({mimetype: (gzip level, brotli quality)}), it is at least `min_size` bytes and
+    the client accepts gzip or br. Buffered bodies up to `buffer_limit` bytes are
+    compressed at once; larger and streamed bodies while they are sent. Returns the
+    response.
+    """
+    levels = mimetypes.get(response.mimetype)
+    if (levels is None or response.direct_passthrough or response.status_code < 200
+            or response.status_code in SKIP_STATUS or 'Content-Encoding' in response.headers
+            or 'Content-Range' in response.headers or response.cache_control.no_transform):
+        return response
+
+    if response.is_streamed:
+        length = response.content_length
+        if length is not None and length < min_size:
+            return response
+        body = None
+    else:
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(accept_encodings)
+    if encoding is None:
+        return response
+
+    compressor = make_compressor(encoding, levels)
+    if body is None:
+        response.response = compress_chunks(response.response, compressor, flush_size)
+        response.headers.pop('Content-Length', None)
+    elif len(body) <= buffer_limit:
+        response.set_data(compressor.compress(body) + compressor.finish())
+    else:
+        # Nothing renders a buffered body progressively, so no sync flushes: they only cost ratio
+        response.response = compress_chunks(iter_slices(body), compressor)
+        response.headers.pop('Content-Length', None)
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed bytes differ from the identity ones; keep the validator but make
+    # it weak, as nginx does, so If-None-Match still matches either representation
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,98 @@
+"""
+Gunicorn settings for serving wsgi:app on a single multi-core box.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every value can be overridden with a GUNICORN_* environment variable. Graceful
+operations (signals to the master process):
+    HUP   re-read this file and replace the workers one by one
+    USR2  start a new master with fresh code (then QUIT the old one); needed for code
+          changes, since with preload_app the application is imported by the master
+    TERM  stop accepting connections and let in-flight requests finish
+"""
+import multiprocessing
+import os
+import tempfile
+
+import metrics
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(f'GUNICORN_{name}')
+    return default if value is None else cast(value)
+
+
+bind = _env('BIND', '127.0.0.1:8000')
+
+# Preforked workers, each serving requests on a few threads: most time is spent
+# waiting on MySQL, so threads keep a worker busy without another process.
+workers = _env('WORKERS', multiprocessing.cpu_count() * 2 + 1, int)
+worker_class = 'gthread'
+threads = _env('THREADS', 4, int)
+
+# Import the application once in the master; workers fork from it and share
+# its memory pages until they write to them.
+preload_app = _env('PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers after a number of requests (jittered so they do not all
+# restart together) to bound memory growth.
+max_requests = _env('MAX_REQUESTS', 1000, int)
+max_requests_jitter = _env('MAX_REQUESTS_JITTER', 100, int)
+
+timeout = _env('TIMEOUT', 60, int)
+graceful_timeout = _env('GRACEFUL_TIMEOUT', 30, int)
+keepalive = _env('KEEPALIVE', 5, int)
+
+accesslog = _env('ACCESS_LOG', '-')
+errorlog = _env('ERROR_LOG', '-')
+loglevel = _env('LOG_LEVEL', 'info')
+
+# Workers share request metrics through this directory so /metrics covers all of
+# them. Set here, before the application is loaded, so create_app() picks it up.
+metrics_dir = os.environ.setdefault('TICKETING_METRICS_DIR',
+                                    os.path.join(tempfile.gettempdir(), 'ticketing-metrics'))
+
+# Per-table change counters behind the page ETags, shared the same way. Not cleared on
+# start: the counters only ever grow, so ETags from before a restart stay valid.
+os.environ.setdefault('TICKETING_CHANGE_VERSIONS_DIR', os.path.join(tempfile.gettempdir(), 'ticketing-versions'))
+
+# One slow-query log per worker: RotatingFileHandler cannot rotate a file that several
+# processes append to without losing or interleaving entries. Rotated per-pid files of
+# exited workers are left in place for inspection.
+os.environ.setdefault('TICKETING_SLOW_QUERY_LOG', os.path.join('logs', 'slow_queries.{pid}.log'))
+
+# Compiled template bytecode, shared so a recycled or newly started worker loads it
+# instead of compiling; entries are keyed on the template source, so it never goes stale.
+# Kept in the app's instance folder rather than a shared temp directory: the bytecode is
+# executed, so create_app() only uses a directory private to the user running the app.
+os.environ.setdefault('TICKETING_TEMPLATE_CACHE_DIR',
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'template-cache'))
+
+
+def on_starting(server):
+    """Starts every server run with empty metrics."""
+    metrics.clear_directory(metrics_dir)
+
+
+def pre_fork(server, worker):
+    """Closes the database connections the master opened while loading the app."""
+    from main_app import close_db_pool
+    close_db_pool()
+
+
+def post_fork(server, worker):
+    """Gives each worker its own database connections instead of the master's."""
+    from main_app import reset_after_fork
+    reset_after_fork()
+    server.log.info(f"Worker {worker.pid} reset its database pool")
+
+
+def worker_exit(server, worker):
+    """Writes the worker's final metrics before it goes away."""
+    from main_app import request_metrics
+    request_metrics.flush()
+
+
+def child_exit(server, worker):
+    """Folds an exited worker's metrics into the archive so counters never go backwards."""
+    metrics.mark_process_dead(metrics_dir, worker.pid)
@@ -1,29 +1,155 @@
 from datetime import datetime, timedelta, date
 import os
+import io
+import csv
+import json
+import hashlib
+import mimetypes
+import base64
+import math
+import re
+import stat
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import mysql.connector
 import logging
-from flask import Flask, request, redirect, url_for, render_template, jsonify, flash
-from werkzeug.utils import secure_filename
+from logging.handlers import RotatingFileHandler
+from flask import Flask, Request, Response, request, redirect, url_for, render_template, stream_template, stream_with_context, jsonify, flash, get_flashed_messages, g, session, has_app_context, has_request_context, abort
+from flask.signals import message_flashed
+from jinja2 import FileSystemBytecodeCache
+from werkzeug.utils import secure_filename, send_file, send_from_directory
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask import Blueprint
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+import assets
+import attachments
+import compression
+import metrics
+import migrate
+
+try:
+    import openpyxl  # optional, only needed for .xlsx imports
+except ImportError:
+    openpyxl = None
+
+try:
+    import fcntl  # POSIX only, needed when CHANGE_VERSIONS_DIR is set
+except ImportError:
+    fcntl = None
 
 # --- Main Flask App Initialization ---
+class AttachmentRequest(Request):
+    """Streams uploaded files straight into hashing temp files inside the upload folder."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return attachments.HashingSpoolFile(os.path.join(app.config['UPLOAD_FOLDER'], 'tmp'))
+
 app = Flask(__name__,
             template_folder='html', 
             static_folder='static')
+app.request_class = AttachmentRequest
 
 # --- Configuration ---
-app.secret_key = 'your-super-secret-key'
+# Defaults below; create_app() overrides them from a config file and TICKETING_* environment variables.
+app.config['SECRET_KEY'] = 'your-super-secret-key'  # development only, see INSECURE_DEFAULTS
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['MAX_CONTENT_LENGTH'] = 25 * 1024 * 1024  # largest accepted request body (attachments included)
+# How attachment bytes are sent: None streams them from Python; 'x-accel-redirect' (nginx) or
+# 'x-sendfile' (Apache/lighttpd) hand the transfer to the front proxy once access is checked.
+app.config['ATTACHMENT_SENDFILE_MODE'] = None
+app.config['ATTACHMENT_ACCEL_PREFIX'] = '/protected-uploads/'  # internal nginx location aliased to UPLOAD_FOLDER
+app.config['ATTACHMENT_MAX_AGE'] = 3600    # seconds browsers may reuse a downloaded attachment
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx'}
+IMPORT_EXTENSIONS = {'csv', 'xlsx'}
+app.config['IMPORT_CHUNK_SIZE'] = 500      # rows per executemany/commit during bulk imports
+app.config['IMPORT_HASH_WORKERS'] = os.cpu_count() or 2  # threads hashing imported passwords
 
 # --- Database Configuration ---
-DB_HOST = "127.0.0.1"
-DB_USER = "root"
-DB_PASSWORD = "Divy@2308"
-DB_NAME = "user_master"
+app.config['DB_HOST'] = "127.0.0.1"
+app.config['DB_USER'] = "root"
+app.config['DB_PASSWORD'] = "Divy@2308"  # development only, see INSECURE_DEFAULTS
+app.config['DB_NAME'] = "user_master"
+
+# create_app() refuses to start outside debug mode while any of these keep their default
+INSECURE_DEFAULTS = {'SECRET_KEY': app.config['SECRET_KEY'], 'DB_PASSWORD': app.config['DB_PASSWORD']}
+
+# --- Schema ---
+app.config['SCHEMA_CHECK'] = True          # log the schema version (and any pending migrations) at startup
+app.config['MIGRATE_ON_STARTUP'] = False   # apply pending migrations in create_app() (see migrate.py)
+
+# --- Connection Pool Configuration ---
+app.config['DB_POOL_SIZE'] = 10            # connections kept open while idle
+app.config['DB_POOL_MAX_OVERFLOW'] = 10    # extra connections allowed under load, closed on release
+app.config['DB_POOL_TIMEOUT'] = 5          # seconds to wait for a free connection before giving up
+app.config['DB_POOL_RECYCLE'] = 3600       # seconds before a connection is replaced (stay under wait_timeout)
+app.config['DB_POOL_PING_AFTER'] = 30      # idle seconds after which a connection is pinged on checkout
+
+# --- Cache Configuration ---
+app.config['USER_CACHE_SIZE'] = 1024       # logged-in user principals kept in memory
+app.config['USER_CACHE_TTL'] = 60          # upper bound on reusing a principal; re-read at once when 'users' changes
+app.config['REFERENCE_DATA_TTL'] = 300     # upper bound on reusing dropdown lists; reloaded at once when 'users' changes
+app.config['ATTENDANCE_LATE_AFTER'] = '09:30'  # check-ins after this time count as late arrivals
+app.config['STREAM_LISTINGS'] = True       # stream the leave/holiday pages row by row instead of buffering them
+app.config['HOLIDAY_CALENDAR_TTL'] = 600   # upper bound on the in-memory holiday calendar; reloaded at once when 'holidays' changes
+app.config['TICKET_SUMMARY_TTL'] = 30      # seconds the dashboard ticket counts are served from memory
+app.config['TICKET_SUMMARY_WEEKS'] = 8     # weeks of history in the dashboard trend chart
+# 'fulltext' uses the MySQL FULLTEXT index on tickets(subject, description) (migrations/0008_tickets_fulltext.sql);
+# 'memory' keeps an inverted index in each worker for servers without FULLTEXT support
+app.config['TICKET_SEARCH_BACKEND'] = 'fulltext'
+app.config['TICKET_SEARCH_INDEX_TTL'] = 900  # upper bound on the in-memory index; rebuilt at once when another worker edits tickets
+app.config['TICKET_SEARCH_FACET_LIMIT'] = 20  # customers listed in the search facets
+# Directory holding the per-table change counters behind the page ETags, shared by all
+# workers; None keeps them per process (workers then never agree on an ETag, which is safe)
+app.config['CHANGE_VERSIONS_DIR'] = None
+
+# --- Metrics Configuration ---
+# Directory where each worker writes its request metrics so /metrics can report all of
+# them; None keeps metrics per process (fine for the development server).
+app.config['METRICS_DIR'] = None
+app.config['METRICS_FLUSH_INTERVAL'] = 5   # seconds between a worker's writes to METRICS_DIR
+app.config['METRICS_TOKEN'] = None         # if set, /metrics requires "Authorization: Bearer <token>"
+
+# --- Slow Query Log ---
+app.config['SLOW_QUERY_THRESHOLD'] = 0.5   # seconds a statement may take before it is logged; None disables
+# JSON-lines log of slow statements; '{pid}' in the path gives each worker its own file,
+# which avoids several processes rotating the same file
+app.config['SLOW_QUERY_LOG'] = 'logs/slow_queries.log'
+app.config['SLOW_QUERY_LOG_MAX_BYTES'] = 10 * 1024 * 1024
+app.config['SLOW_QUERY_LOG_BACKUPS'] = 5
+app.config['SLOW_QUERY_EXPLAIN'] = False   # also log the EXPLAIN plan of slow statements
+app.config['SLOW_QUERY_EXPLAIN_INTERVAL'] = 3600  # seconds before the same statement shape is explained again
+
+# --- Templates ---
+app.config['TEMPLATES_AUTO_RELOAD'] = None  # None: check template files for changes only in debug mode
+# Directory shared by all workers for compiled template bytecode, private to the app's user
+# (see ensure_private_dir); None compiles in every process
+app.config['TEMPLATE_CACHE_DIR'] = None
+app.config['TEMPLATE_WARMUP'] = True       # compile all templates and render each page once in create_app()
+
+# --- Response Compression ---
+# Content types compressed on the fly, with their (gzip level, brotli quality); br needs the brotli package
+app.config['COMPRESS_MIMETYPES'] = {
+    'text/html': (6, 5),
+    'application/json': (6, 5),
+    'text/csv': (6, 5),
+    'text/plain': (6, 5),
+    'text/css': (6, 5),
+    'text/javascript': (6, 5),
+    'application/javascript': (6, 5),
+    'image/svg+xml': (6, 5),
+}
+app.config['COMPRESS_MIN_SIZE'] = 1024     # smaller bodies are not worth the CPU and the extra headers
+app.config['COMPRESS_STREAM_FLUSH_SIZE'] = 16 * 1024  # streamed pages are flushed to the client at least this often
+app.config['COMPRESS_BUFFER_LIMIT'] = 256 * 1024  # larger buffered bodies are compressed while being sent
+
+# --- Static Assets ---
+# Files built by assets.py get a content hash in their name, so browsers may keep them forever
+app.config['STATIC_ASSET_MAX_AGE'] = 365 * 24 * 3600
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO)
@@ -40,25 +166,1167 @@ def roles_required(*roles):
 
 # --- Helper Functions ---
 
+class ConnectionPool:
+    """A bounded pool of MySQL connections with overflow, checkout timeouts and stats."""
+
+    def __init__(self, size, max_overflow, timeout, recycle, ping_after, **connect_args):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self.connect_args = connect_args
+        self._idle = deque()  # (connection, created_at, released_at)
+        self._created = {}    # id(connection) -> created_at, for connections checked out
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {'checkouts': 0, 'connects': 0, 'timeouts': 0, 'waits': 0,
+                       'wait_seconds': 0.0, 'invalidated': 0, 'recycled': 0}
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._stats['connects'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+    def _is_usable(self, conn, created_at, released_at):
+        """Validates an idle connection before it is handed out."""
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            reason = 'recycled'
+        elif now - released_at > self.ping_after:
+            try:
+                conn.ping(reconnect=False)
+                return True
+            except mysql.connector.Error:
+                reason = 'invalidated'
+        else:
+            return True
+        with self._cond:
+            self._stats[reason] += 1
+        return False
+
+    def acquire(self):
+        """Checks out a connection, waiting up to `timeout` seconds when the pool is exhausted."""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created_at, released_at = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise mysql.connector.errors.PoolError(
+                        f"Timed out after {self.timeout}s waiting for a database connection")
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                started = time.monotonic()
+                self._cond.wait(remaining)
+                self._stats['wait_seconds'] += time.monotonic() - started
+
+        if conn is not None and not self._is_usable(conn, created_at, released_at):
+            self._discard(conn)
+            conn = None
+        if conn is None:
+            try:
+                conn = self._connect()
+            except mysql.connector.Error:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+            created_at = time.monotonic()
+
+        with self._cond:
+            self._created[id(conn)] = created_at
+            self._stats['checkouts'] += 1
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, ending any transaction left open by the caller."""
+        healthy = True
+        try:
+            conn.rollback()
+        except mysql.connector.Error:
+            healthy = False
+
+        with self._cond:
+            created_at = self._created.pop(id(conn), time.monotonic())
+            if healthy and len(self._idle) < self.size:
+                self._idle.append((conn, created_at, time.monotonic()))
+                conn = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if conn is not None:
+            self._discard(conn)
+
+    def close(self):
+        """Closes the idle connections, ending their server sessions."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def detach(self):
+        """
+        Closes the idle connections a forked child inherited without touching the
+        server sessions, which belong to the parent: only the child's file descriptors
+        are released. close() or shutdown() would send QUIT or shut the shared socket
+        down, and so would garbage collection of the connection objects.
+        """
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for conn, _, _ in idle:
+            sock = getattr(conn, '_socket', None)  # connector's socket wrapper (pure-Python protocol)
+            if sock is not None:
+                sock.close_connection()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats,
+                        size=self.size,
+                        max_overflow=self.max_overflow,
+                        open=self._open,
+                        idle=len(self._idle),
+                        checked_out=self._open - len(self._idle))
+
+
+SQL_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+SQL_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+SQL_VALUE_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+
+def statement_shape(operation):
+    """
+    Reduces a statement to its shape: literals become '?', IN lists of any length
+    become '(...)' and whitespace is collapsed, so repeats of a query group together.
+    """
+    if isinstance(operation, (bytes, bytearray)):
+        operation = operation.decode('utf-8', 'replace')
+    shape = SQL_NUMBER_RE.sub('?', SQL_STRING_RE.sub('?', operation))
+    shape = ' '.join(shape.split())
+    return SQL_VALUE_LIST_RE.sub('(...)', shape)
+
+def params_shape(params):
+    """Describes bound parameters by type only, so values (passwords, names) never reach the log."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+_slow_query_logger = None
+_slow_query_lock = threading.Lock()
+_explained_at = {}  # statement fingerprint -> time.monotonic() of its last EXPLAIN
+
+def get_slow_query_logger():
+    """Returns the logger writing the rotating slow-query log, creating it on first use."""
+    global _slow_query_logger
+    if _slow_query_logger is None:
+        with _slow_query_lock:
+            if _slow_query_logger is None:
+                path = app.config['SLOW_QUERY_LOG'].format(pid=os.getpid())
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=app.config['SLOW_QUERY_LOG_MAX_BYTES'],
+                                              backupCount=app.config['SLOW_QUERY_LOG_BACKUPS'])
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger = logging.getLogger(f'{__name__}.slow_queries')
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(handler)
+                _slow_query_logger = logger
+    return _slow_query_logger
+
+def reset_slow_query_logger():
+    """Closes the slow-query log handler, so the next slow statement reopens the log for this process's pid."""
+    global _slow_query_logger
+    with _slow_query_lock:
+        if _slow_query_logger is not None:
+            for handler in list(_slow_query_logger.handlers):
+                _slow_query_logger.removeHandler(handler)
+                handler.close()
+        _slow_query_logger = None
+
+def write_slow_query_log(event, **fields):
+    record = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'event': event, 'pid': os.getpid()}
+    if has_request_context():
+        record.update(endpoint=request.endpoint, method=request.method, path=request.path)
+    record.update(fields)
+    get_slow_query_logger().info(json.dumps(record, default=str))
+
+def log_slow_query(operation, params, elapsed, many=False):
+    """
+    Logs a statement that ran longer than SLOW_QUERY_THRESHOLD and, if EXPLAIN is
+    enabled and this shape was not explained within the interval, queues an EXPLAIN.
+    The EXPLAIN runs when the request's connection is released (see
+    explain_pending_queries), after the response has been produced.
+    """
+    shape = statement_shape(operation)
+    fingerprint = hashlib.sha1(shape.encode()).hexdigest()[:12]
+    fields = {'fingerprint': fingerprint, 'elapsed_ms': round(elapsed * 1000, 1),
+              'threshold_ms': round(app.config['SLOW_QUERY_THRESHOLD'] * 1000, 1), 'statement': shape}
+    if many:
+        params = list(params or [])
+        fields.update(rows=len(params), params=params_shape(params[0]) if params else None)
+    else:
+        fields['params'] = params_shape(params)
+    write_slow_query_log('slow_query', **fields)
+
+    if many or not app.config['SLOW_QUERY_EXPLAIN'] or not has_app_context():
+        return
+    now = time.monotonic()
+    with _slow_query_lock:
+        last = _explained_at.get(fingerprint)
+        if last is not None and now - last < app.config['SLOW_QUERY_EXPLAIN_INTERVAL']:
+            return
+        _explained_at[fingerprint] = now
+    g.setdefault('pending_explains', []).append((fingerprint, shape, operation, params))
+
+def explain_pending_queries(conn):
+    """Runs and logs the EXPLAINs queued by log_slow_query() on the request's connection."""
+    for fingerprint, shape, operation, params in g.pop('pending_explains', []):
+        cursor = None
+        try:
+            cursor = conn.raw_cursor(dictionary=True)
+            cursor.execute(f"EXPLAIN {operation}", params)
+            write_slow_query_log('explain', fingerprint=fingerprint, statement=shape, plan=cursor.fetchall())
+        except mysql.connector.Error as err:
+            app.logger.warning(f"Could not EXPLAIN slow statement {fingerprint}: {err}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+class InstrumentedCursor:
+    """
+    Wraps a cursor to count statements and time database calls (execute and fetch)
+    for the current request; the totals end up in the request metrics. Statements
+    slower than SLOW_QUERY_THRESHOLD are written to the slow-query log.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, method, args, kwargs, statements=0):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            if has_app_context():
+                g.db_queries = g.get('db_queries', 0) + statements
+                g.db_seconds = g.get('db_seconds', 0.0) + elapsed
+            threshold = app.config['SLOW_QUERY_THRESHOLD']
+            if statements and threshold is not None and elapsed >= threshold:
+                params = args[1] if len(args) > 1 else kwargs.get('params', kwargs.get('seq_params'))
+                log_slow_query(args[0] if args else kwargs.get('operation'), params, elapsed,
+                               many=method == self._cursor.executemany)
+
+    def execute(self, *args, **kwargs):
+        return self._timed(self._cursor.execute, args, kwargs, statements=1)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed(self._cursor.executemany, args, kwargs, statements=1)
+
+    def fetchone(self):
+        return self._timed(self._cursor.fetchone, (), {})
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, args, kwargs)
+
+    def fetchall(self):
+        return self._timed(self._cursor.fetchall, (), {})
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled connection. Calling close() hands the connection back
+    to the pool, except for the request-scoped connection, which is returned once
+    in the app teardown so every get_db_connection() call in a request shares it.
+    """
+
+    def __init__(self, pool, conn, request_scoped=False):
+        self._pool = pool
+        self._conn = conn
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def raw_cursor(self, *args, **kwargs):
+        """Returns a cursor that bypasses the instrumentation (for the slow-query EXPLAINs)."""
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        if not self._request_scoped:
+            self.release()
+
+    def release(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = ConnectionPool(
+                    size=app.config['DB_POOL_SIZE'],
+                    max_overflow=app.config['DB_POOL_MAX_OVERFLOW'],
+                    timeout=app.config['DB_POOL_TIMEOUT'],
+                    recycle=app.config['DB_POOL_RECYCLE'],
+                    ping_after=app.config['DB_POOL_PING_AFTER'],
+                    host=app.config['DB_HOST'],
+                    user=app.config['DB_USER'],
+                    password=app.config['DB_PASSWORD'],
+                    database=app.config['DB_NAME']
+                )
+    return _db_pool
+
+def reset_db_pool():
+    """
+    Replaces the process's pool with a fresh one on next use. A forked worker shares
+    the inherited sockets with its parent, so they are detached (the child's file
+    descriptors closed, the parent's sessions left alone) rather than closed.
+    """
+    global _db_pool
+    pool, _db_pool = _db_pool, None
+    if pool is not None:
+        pool.detach()
+
+def close_db_pool():
+    """
+    Closes the pool's idle connections. The gunicorn master calls this before forking,
+    so the connections it opened at startup end cleanly and workers inherit none.
+    """
+    if _db_pool is not None:
+        _db_pool.close()
+
 def get_db_connection():
-    """Establishes a connection to the MySQL database."""
+    """
+    Returns a pooled connection to the MySQL database. Inside a request the same
+    connection is reused for the whole request and returned to the pool on teardown.
+    """
+    if has_app_context() and 'db_conn' in g:
+        return g.db_conn
     try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return conn
+        pool = get_db_pool()
+        conn = PooledConnection(pool, pool.acquire(), request_scoped=has_app_context())
     except mysql.connector.Error as err:
         app.logger.error(f"Error connecting to MySQL: {err}")
         return None
+    if has_app_context():
+        g.db_conn = conn
+    return conn
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Returns the request's connection (if one was checked out) to the pool."""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        explain_pending_queries(conn)
+        conn.release()
+
+request_metrics = metrics.MetricsRegistry(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli-encodes HTML, JSON and other text responses the client accepts compressed."""
+    return compression.compress_response(
+        response, request.accept_encodings, app.config['COMPRESS_MIMETYPES'],
+        app.config['COMPRESS_MIN_SIZE'], app.config['COMPRESS_STREAM_FLUSH_SIZE'],
+        app.config['COMPRESS_BUFFER_LIMIT']
+    )
+
+@app.teardown_request
+def record_request_metrics(exception=None):
+    """
+    Records the request once it is completely finished. Teardown runs after a
+    streamed response body has been sent, so streaming pages are timed in full.
+    """
+    started = g.get('request_started')
+    if started is None:
+        return
+    request_metrics.observe_request(
+        endpoint=request.endpoint or 'none',
+        blueprint=request.blueprint or 'app',
+        method=request.method,
+        status=500 if exception is not None else g.get('response_status', 500),
+        duration=time.perf_counter() - started,
+        db_queries=g.get('db_queries', 0),
+        db_seconds=g.get('db_seconds', 0.0),
+    )
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Exposes request and database metrics for all workers in Prometheus text format."""
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class ReferenceDataCache:
+    """
+    Caches the small lookup lists behind the form dropdowns, all read from `table`.
+    A list is reloaded as soon as table_versions reports a change to `table`, so a
+    write through any worker is seen by every worker on its next request; the TTL
+    only bounds how long a list lives. Each list carries a version stamp derived from
+    its content, so every worker computes the same stamp for the same data and
+    templates/ETags can be keyed on it.
+    """
+
+    def __init__(self, queries, ttl, table):
+        self.queries = queries
+        self.table = table
+        self._cache = TTLCache(len(queries), ttl)
+
+    @property
+    def ttl(self):
+        return self._cache.ttl
+
+    @ttl.setter
+    def ttl(self, ttl):
+        self._cache.ttl = ttl
+
+    def get(self, name, cursor=None):
+        """
+        Returns the named list, loading it on a miss with `cursor` (or a connection
+        of its own). Raises mysql.connector.Error if it cannot be loaded.
+        """
+        return self._entry(name, cursor)[0]
+
+    def _entry(self, name, cursor=None):
+        table_version = table_versions.get(self.table)  # read before loading: a concurrent write leaves it stale, not missed
+        entry = self._cache.get(name)
+        if entry is None or entry[2] != table_version:
+            entry = self._load(name, cursor) + (table_version,)
+            self._cache.set(name, entry)
+        return entry
+
+    def _load(self, name, cursor):
+        conn = None
+        if cursor is None:
+            conn = get_db_connection()
+            if conn is None:
+                raise mysql.connector.errors.InterfaceError("Database connection failed")
+            cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(self.queries[name])
+            rows = cursor.fetchall()
+        finally:
+            if conn is not None:
+                cursor.close()
+                conn.close()
+        stamp = hashlib.sha1(json.dumps(rows, default=str).encode()).hexdigest()[:12]
+        return rows, stamp
+
+    def version(self, *names):
+        """Returns a combined stamp for the named lists (all lists by default)."""
+        return '-'.join(self._entry(name)[1] for name in names or sorted(self.queries))
+
+    def invalidate(self):
+        self._cache.clear()
+
+def as_date(value):
+    """Normalizes a DATE column value (date, datetime or 'YYYY-MM-DD' string) to a date, or None."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    return None
+
+def resolve_date_filter(filter_type, start_date_str, end_date_str):
+    """
+    Turns the listing filter arguments (all/this_month/this_week/today/custom_range)
+    into a (start, end) pair of dates; either end may be None for an open range.
+    """
+    start_date_filter = None
+    end_date_filter = None
+
+    current_date = date.today()
+
+    if filter_type == 'this_month':
+        start_date_filter = current_date.replace(day=1)
+        if current_date.month == 12:
+            end_date_filter = current_date.replace(year=current_date.year + 1, month=1, day=1) - timedelta(days=1)
+        else:
+            end_date_filter = current_date.replace(month=current_date.month + 1, day=1) - timedelta(days=1)
+    elif filter_type == 'this_week':
+        start_date_filter = current_date - timedelta(days=current_date.weekday())
+        end_date_filter = start_date_filter + timedelta(days=6)
+    elif filter_type == 'today':
+        start_date_filter = current_date
+        end_date_filter = current_date
+    elif filter_type == 'custom_range':
+        try:
+            if start_date_str:
+                start_date_filter = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+            if end_date_str:
+                end_date_filter = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            flash("Invalid date format for custom range. Please use YYYY-MM-DD.", 'error')
+            start_date_filter = None
+            end_date_filter = None
+
+    return start_date_filter, end_date_filter
+
+def date_range_clause(column, start_date, end_date):
+    """Builds the WHERE fragment and params for an optional [start_date, end_date] range on `column`."""
+    if start_date and end_date:
+        return f"{column} BETWEEN %s AND %s", [start_date, end_date]
+    if start_date:
+        return f"{column} >= %s", [start_date]
+    if end_date:
+        return f"{column} <= %s", [end_date]
+    return None, []
+
+def iter_rows(cursor, batch_size=500):
+    """
+    Yields rows from an unbuffered cursor a batch at a time and closes the cursor
+    once the result is exhausted. A database error mid-stream is logged and
+    re-raised, so the response fails visibly instead of ending early as if the
+    result were complete. If the consumer stops early (client disconnect),
+    the rest of the result is read and discarded first: an unbuffered cursor cannot
+    be closed, nor its connection reused, with rows still pending.
+    """
+    exhausted = False
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                exhausted = True
+                break
+            yield from rows
+    except mysql.connector.Error as err:
+        app.logger.error(f"Error while streaming rows: {err}")
+        raise
+    finally:
+        try:
+            while not exhausted and cursor.fetchmany(batch_size):
+                pass
+            cursor.close()
+        except mysql.connector.Error as err:
+            app.logger.error(f"Error while closing a streamed cursor: {err}")
+
+def day_bounds(start_date, end_date):
+    """Widens a (start, end) date filter to datetimes covering the whole of both days, for DATETIME columns."""
+    start = datetime.combine(start_date, datetime.min.time()) if start_date else None
+    end = datetime.combine(end_date, datetime.max.time().replace(microsecond=0)) if end_date else None
+    return start, end
+
+def stream_csv(filename, cursor, buffer_size=64 * 1024):
+    """
+    Returns a streamed CSV download of the result pending on an unbuffered cursor.
+    Rows are pulled from the server as the client reads, so memory stays flat
+    regardless of how many rows are exported. If the database fails mid-export, an
+    error row is written and the download is aborted, so a truncated file is never
+    mistaken for a complete one.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(cursor.column_names)
+        try:
+            for row in iter_rows(cursor):
+                writer.writerow(row)
+                if buffer.tell() >= buffer_size:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        except mysql.connector.Error:
+            writer.writerow(['ERROR: export incomplete, a database error interrupted it. Please try again.'])
+            yield buffer.getvalue()
+            raise
+        yield buffer.getvalue()
+
+    response = app.response_class(stream_with_context(generate()), mimetype='text/csv')
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    return response
+
+def export_query(sql_query, params, filename):
+    """Runs an export query on an unbuffered cursor and streams it as CSV."""
+    conn = get_db_connection()
+    if conn is None:
+        return "Database connection failed! Please check server logs.", 500
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql_query, tuple(params))
+    except mysql.connector.Error as err:
+        cursor.close()
+        app.logger.error(f"Export query failed. Error: {err}")
+        return "Failed to export data.", 500
+    return stream_csv(filename, cursor)
+
+@app.template_filter('display_date')
+def display_date_filter(value):
+    """Formats a date column as DD/MM/YYYY for display; unparseable strings pass through."""
+    parsed = as_date(value)
+    if parsed is None:
+        return value or ''
+    return parsed.strftime('%d/%m/%Y')
+
+@app.template_filter('form_date')
+def form_date_filter(value):
+    """Formats a date column as YYYY-MM-DD for <input type="date">; unparseable strings pass through."""
+    parsed = as_date(value)
+    if parsed is None:
+        return value or ''
+    return parsed.strftime('%Y-%m-%d')
+
+# --- Bulk Import Helpers ---
+
+def read_import_rows(file):
+    """
+    Yields (row_number, row) for each non-empty data row of an uploaded CSV or XLSX
+    file, reading it as a stream. Header names are lower-cased with spaces turned
+    into underscores. Raises ValueError for unsupported or unreadable files.
+    """
+    extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    if extension == 'csv':
+        text = io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.reader(text)
+            header = next(reader, None)
+            if not header:
+                raise ValueError("The file has no header row.")
+            header = [h.strip().lower().replace(' ', '_') for h in header]
+            for row_number, values in enumerate(reader, start=2):
+                if any(v.strip() for v in values):
+                    yield row_number, dict(zip(header, (v.strip() for v in values)))
+        except UnicodeDecodeError:
+            raise ValueError("CSV files must be UTF-8 encoded.")
+        finally:
+            text.detach()
+    elif extension == 'xlsx':
+        if openpyxl is None:
+            raise ValueError("XLSX import requires the openpyxl package; upload a CSV instead.")
+        workbook = openpyxl.load_workbook(file.stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                raise ValueError("The file has no header row.")
+            header = [str(h or '').strip().lower().replace(' ', '_') for h in header]
+            for row_number, values in enumerate(rows, start=2):
+                values = [v.strip() if isinstance(v, str) else ('' if v is None else v) for v in values]
+                if any(v != '' for v in values):
+                    yield row_number, dict(zip(header, values))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported file type. Allowed: {', '.join(sorted(IMPORT_EXTENSIONS))}.")
+
+def import_cell(row, field, required=False):
+    """Returns an import cell as read (XLSX cells keep their type), None when blank; raises ValueError if a required cell is blank."""
+    value = row.get(field)
+    if isinstance(value, str):
+        value = value.strip() or None
+    if value == '':
+        value = None
+    if required and value is None:
+        raise ValueError(f"'{field}' is required.")
+    return value
+
+def import_value(row, field, required=False):
+    """
+    Like import_cell(), but always returns text: XLSX numbers (a numeric password or
+    user name) and other typed cells are converted, 123456.0 becoming '123456'.
+    """
+    value = import_cell(row, field, required)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def import_date(row, field, required=False):
+    """Like import_cell(), but parses the cell as a YYYY-MM-DD (or spreadsheet) date."""
+    value = import_cell(row, field, required)
+    if value is None:
+        return None
+    parsed = as_date(value)
+    if parsed is None:
+        raise ValueError(f"'{field}' must be a date in YYYY-MM-DD format.")
+    return parsed
+
+def import_choice(row, field, choices, required=False):
+    """Like import_value(), but only accepts one of `choices`."""
+    value = import_value(row, field, required)
+    if value is not None and value not in choices:
+        raise ValueError(f"'{field}' must be one of: {', '.join(choices)}.")
+    return value
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+def hash_passwords(passwords):
+    """Hashes passwords on a thread pool; the hashlib KDFs release the GIL while they run."""
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ThreadPoolExecutor(max_workers=app.config['IMPORT_HASH_WORKERS'],
+                                                thread_name_prefix='password-hash')
+    return list(_hash_pool.map(generate_password_hash, passwords))
+
+def run_bulk_import(file, validate, insert_sql, prepare_chunk=None, on_commit=None):
+    """
+    Validates each row of an uploaded CSV/XLSX file with `validate` (row -> insert
+    params, raising ValueError for bad rows) and inserts the valid rows with
+    executemany, one transaction per IMPORT_CHUNK_SIZE rows. `prepare_chunk`, if
+    given, can fill in expensive values for a whole chunk at once; `on_commit` is
+    called after each transaction that inserted rows (to bump table versions, clear
+    caches), even if a later chunk fails. Returns a report; bad rows are listed in
+    report['errors'] without aborting the rest of the import.
+    """
+    report = {'inserted': 0, 'failed': 0, 'errors': []}
+
+    def fail(row_number, message):
+        report['failed'] += 1
+        report['errors'].append({'row': row_number, 'error': message})
+
+    conn = get_db_connection()
+    if conn is None:
+        raise mysql.connector.errors.InterfaceError("Database connection failed")
+    cursor = conn.cursor()
+
+    def insert_chunk(chunk):
+        params = [p for _, p in chunk]
+        if prepare_chunk:
+            prepare_chunk(params)
+        inserted = report['inserted']
+        try:
+            cursor.executemany(insert_sql, params)
+            conn.commit()
+            report['inserted'] += len(chunk)
+        except mysql.connector.Error:
+            conn.rollback()
+            # Retry row by row to find the offenders; a failing statement only rolls back itself
+            for row_number, row_params in chunk:
+                try:
+                    cursor.execute(insert_sql, row_params)
+                    report['inserted'] += 1
+                except mysql.connector.Error as err:
+                    fail(row_number, err.msg if err.errno == 1062 else f"Database error: {err.msg}")
+            conn.commit()
+        if on_commit and report['inserted'] > inserted:
+            on_commit()
+
+    chunk = []
+    try:
+        for row_number, row in read_import_rows(file):
+            try:
+                chunk.append((row_number, validate(row)))
+            except ValueError as err:
+                fail(row_number, str(err))
+                continue
+            if len(chunk) >= app.config['IMPORT_CHUNK_SIZE']:
+                insert_chunk(chunk)
+                chunk = []
+        if chunk:
+            insert_chunk(chunk)
+    finally:
+        cursor.close()
+        conn.close()
+    return report
+
+def handle_import_upload(validate, insert_sql, prepare_chunk=None, on_commit=None):
+    """Runs a bulk import for the request's 'file' upload and returns the JSON report response."""
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return jsonify({'error': 'No file uploaded.'}), 400
+    try:
+        report = run_bulk_import(file, validate, insert_sql, prepare_chunk, on_commit)
+    except ValueError as err:
+        return jsonify({'error': str(err)}), 400
+    except mysql.connector.Error as err:
+        app.logger.error(f"Bulk import failed. Error: {err}")
+        return jsonify({'error': 'An internal error occurred.'}), 500
+    return jsonify(report), 200
+
+class HolidayCalendar:
+    """
+    Process-wide, date-sorted copy of the holidays table with display/form dates
+    preformatted. Range queries are answered by bisecting over date ordinals, so the
+    holiday page needs no database round-trip. The copy is reloaded whenever
+    table_versions reports a change to the holidays table, wherever it was written;
+    the TTL only bounds its age.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ordinals = []
+        self._holidays = []
+        self._expires_at = 0
+        self._table_version = None
+
+    def _load(self):
+        conn = get_db_connection()
+        if conn is None:
+            raise mysql.connector.errors.InterfaceError("Database connection failed")
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT id, country, name, holiday_date FROM holidays ORDER BY holiday_date ASC")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+        holidays = []
+        for row in rows:
+            holiday_date = as_date(row['holiday_date'])
+            if holiday_date is None:
+                app.logger.warning(f"Skipping holiday {row['id']} with unreadable date {row['holiday_date']!r}")
+                continue
+            row['holiday_date'] = holiday_date
+            row['display_date'] = holiday_date.strftime('%d/%m/%Y')
+            row['form_date'] = holiday_date.strftime('%Y-%m-%d')
+            holidays.append(row)
+        holidays.sort(key=lambda h: h['holiday_date'])
+        return [h['holiday_date'].toordinal() for h in holidays], holidays
+
+    def _ensure_loaded(self):
+        table_version = table_versions.get('holidays')
+        if table_version == self._table_version and time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if table_version == self._table_version and time.monotonic() < self._expires_at:
+                return
+            self._ordinals, self._holidays = self._load()
+            self._table_version = table_version
+            self._expires_at = time.monotonic() + self.ttl
+
+    def between(self, start=None, end=None):
+        """Returns holidays with start <= holiday_date <= end, in date order. Either bound may be None."""
+        self._ensure_loaded()
+        ordinals, holidays = self._ordinals, self._holidays
+        lo = bisect_left(ordinals, start.toordinal()) if start else 0
+        hi = bisect_right(ordinals, end.toordinal()) if end else len(ordinals)
+        return holidays[lo:hi]
+
+    def invalidate(self):
+        self._expires_at = 0
+
+class TableVersions:
+    """
+    Change counters per table, bumped after every committed write, that make up the
+    page ETags (see conditional_page). With a directory the counters are small files
+    updated under flock, so every worker sees every other worker's writes; an epoch
+    token created once per directory keeps counters that restart from zero (directory
+    wiped) from matching ETags handed out before. Without a directory the counters
+    are per process.
+    """
+
+    WIDTH = 20  # counters are written zero-padded in one write() so readers never see a partial value
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._process_epoch = os.urandom(8).hex()
+
+    def _epoch(self):
+        path = os.path.join(self.directory, 'epoch')
+        try:
+            with open(path) as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            f.write(os.urandom(8).hex())
+        try:
+            os.link(tmp_path, path)  # atomic create-if-absent: the first process to get here wins
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+        with open(path) as f:
+            return f.read()
+
+    def _read(self, table):
+        try:
+            with open(os.path.join(self.directory, f'{table}.version'), 'rb') as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def get(self, *tables):
+        """Returns one token covering the current versions of `tables`."""
+        if not self.directory:
+            with self._lock:
+                return '-'.join([self._process_epoch] + [str(self._counts.get(t, 0)) for t in tables])
+        return '-'.join([self._epoch()] + [str(self._read(t)) for t in tables])
+
+    def bump(self, *tables):
+        """
+        Records that `tables` changed; call after the write has been committed. Returns
+        the (before, after) tokens of `tables` as get() would give them just around this
+        bump, so a cache that was current before it can tell that nothing else changed.
+        """
+        before, after = [], []
+        if not self.directory:
+            with self._lock:
+                for table in tables:
+                    before.append(self._counts.get(table, 0))
+                    self._counts[table] = before[-1] + 1
+                    after.append(self._counts[table])
+                epoch = self._process_epoch
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            epoch = self._epoch()
+            for table in tables:
+                fd = os.open(os.path.join(self.directory, f'{table}.version'), os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if fcntl is not None:  # no flock on Windows; counters may then miss a concurrent bump
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    value = int(os.read(fd, self.WIDTH) or 0)
+                    os.pwrite(fd, str(value + 1).zfill(self.WIDTH).encode(), 0)
+                finally:
+                    os.close(fd)  # also releases the flock
+                before.append(value)
+                after.append(value + 1)
+        return ('-'.join([epoch] + [str(v) for v in before]), '-'.join([epoch] + [str(v) for v in after]))
+
+    def reset(self):
+        """Starts a new in-memory epoch, so a forked worker does not share its parent's counters."""
+        with self._lock:
+            self._counts.clear()
+            self._process_epoch = os.urandom(8).hex()
+
+table_versions = TableVersions(app.config['CHANGE_VERSIONS_DIR'])
+
+def _page_etag_salt():
+    """Hashes the templates and this module, so a deploy that changes either changes every ETag."""
+    digest = hashlib.sha1()
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    paths = sorted(os.path.join(template_dir, name) for name in os.listdir(template_dir) if name.endswith('.html'))
+    for path in paths + [os.path.abspath(__file__)]:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+PAGE_ETAG_SALT = _page_etag_salt()
+
+@message_flashed.connect_via(app)
+def note_flashed_message(sender, message, category, **extra):
+    g.page_flashed = True
+
+def page_etag(tables):
+    """ETag of the current page: table versions, asset build, endpoint, user and role, query args and today's date."""
+    parts = [
+        PAGE_ETAG_SALT, asset_manifest.version, request.endpoint, table_versions.get(*tables),
+        current_user.get_id(), current_user.user_type, current_user.name,
+        date.today().isoformat(),  # relative date filters ("this month") move with the calendar
+        repr(sorted(request.args.items(multi=True))),
+    ]
+    return hashlib.sha1('\0'.join(str(part) for part in parts).encode()).hexdigest()
+
+def conditional_page(*tables):
+    """
+    Serves a GET page conditionally. When the browser's cached copy (If-None-Match)
+    carries the current ETag the view is not called at all, so there is no query and
+    no render, and a 304 is returned. Pages with pending or new flash messages are
+    always rendered and never get an ETag. Place below login_required/roles_required.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or session.get('_flashes'):
+                return f(*args, **kwargs)
+
+            etag = page_etag(tables)  # taken before the view runs, so a concurrent write can only make it stale
+            if request.if_none_match.contains_weak(etag):  # compressed responses carry it as W/"..."
+                response = Response(status=304)
+            else:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or g.get('page_flashed'):
+                    return response
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
 
 def allowed_file(filename):
     """Checks if the file extension is allowed."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_attachment():
+    """
+    Stores the request's 'attachment' upload in the content-addressed store.
+    Returns (original filename, StoredAttachment), or None if no acceptable file was sent.
+    """
+    file = request.files.get('attachment')
+    if not file or not file.filename or not allowed_file(file.filename):
+        return None
+    return secure_filename(file.filename), attachments.store(file, app.config['UPLOAD_FOLDER'])
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(err):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    flash(f'Upload is too large. Attachments must be smaller than {limit_mb} MB.', 'error')
+    return redirect(request.referrer or url_for('tickets.dashboard'))
+
+reference_data = ReferenceDataCache({
+    'managers': "SELECT id, name FROM users WHERE position IN ('Manager', 'Senior') ORDER BY name",
+    'customers': "SELECT id, name, office_email FROM users WHERE user_type = 'customer' ORDER BY name",
+    'assignees': "SELECT id, name, user_type FROM users WHERE user_type IN ('Admin', 'Consultant') ORDER BY name ASC",
+}, app.config['REFERENCE_DATA_TTL'], 'users')
+
+fragment_cache = TTLCache(64, 3600)  # rendered template fragments keyed by (name, data version)
+
+@app.context_processor
+def inject_reference_data_version():
+    """
+    Lets templates cache fragments built from the dropdown data:
+        {% call cached_fragment('assignee-options', reference_data_version('assignees')) %}...{% endcall %}
+    renders the block once per version of the data and reuses the HTML after that.
+    """
+    def reference_data_version(*names):
+        try:
+            return reference_data.version(*names)
+        except mysql.connector.Error:
+            return ''
+
+    def cached_fragment(name, version, caller):
+        if not version:
+            return caller()
+        html = fragment_cache.get((name, version))
+        if html is None:
+            html = caller()
+            fragment_cache.set((name, version), html)
+        return html
+    return {'reference_data_version': reference_data_version, 'cached_fragment': cached_fragment}
+
+asset_manifest = assets.AssetManifest(app.static_folder)
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    """Points url_for('static', filename=...) at the content-hashed copy from the asset build, if any."""
+    if endpoint == 'static':
+        hashed = asset_manifest.lookup(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+@app.context_processor
+def inject_vendor_url():
+    """vendor_url('bootstrap.min.css'): the local copy once assets.py has vendored it, else the CDN."""
+    def vendor_url(name):
+        if name in asset_manifest.vendored:
+            return url_for('static', filename=f'{assets.VENDOR_DIR}/{name}')
+        return assets.VENDOR[name]
+    return {'vendor_url': vendor_url}
+
+def send_static_asset(filename):
+    """
+    Static file view. Fingerprinted files are sent with a far-future immutable
+    Cache-Control, as the precompressed (.br/.gz) or WebP/AVIF variant the browser
+    accepts; anything else is served as Flask normally does.
+    """
+    if not asset_manifest.is_fingerprinted(filename):
+        return app.send_static_file(filename)
+    accepted_mimetypes = {value for value, quality in request.accept_mimetypes if quality > 0}
+    accepted_encodings = {value for value, quality in request.accept_encodings if quality > 0}
+    path, mimetype, encoding, vary = asset_manifest.variant(filename, accepted_mimetypes, accepted_encodings)
+    response = send_from_directory(
+        app.static_folder, path, request.environ,
+        mimetype=mimetype or mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        max_age=app.config['STATIC_ASSET_MAX_AGE']
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.update(vary)
+    response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = send_static_asset
+
 # --- Blueprint for User Management ---
 users_bp = Blueprint('users', __name__, template_folder='html')
 
@@ -68,25 +1336,13 @@ users_bp = Blueprint('users', __name__, template_folder='html')
 @roles_required('Admin')
 def index():
     """Serves the user form for new user creation, fetching managers."""
-    conn = get_db_connection()
     managers = [] # Initialize an empty list for managers
-
-    if not conn:
-        flash('Database connection failed. Cannot fetch manager data.', 'error')
-        # If DB connection fails, render with default values
-        return render_template('user_form.html', managers=managers)
-
-    cursor = conn.cursor(dictionary=True) # Use dictionary=True for easier access to column names
     try:
-        # Fetch users with position 'Manager' or 'Senior'
-        cursor.execute("SELECT id, name FROM users WHERE position IN ('Manager', 'Senior') ORDER BY name")
-        managers = cursor.fetchall()
+        # Users with position 'Manager' or 'Senior', from the reference data cache
+        managers = reference_data.get('managers')
     except mysql.connector.Error as err:
         app.logger.error(f"Database Error fetching managers in index route: {err}")
         flash('Could not fetch manager data from the database.', 'error')
-    finally:
-        cursor.close()
-        conn.close()
 
     # Pass the managers list to the template
     return render_template('user_form.html', managers=managers)
@@ -94,6 +1350,7 @@ def index():
 @users_bp.route('/users/', methods=['GET'])
 @login_required
 @roles_required('Admin')
+@conditional_page('users')
 def view_users():
     """Fetches all users from the database and displays them in a table."""
     conn = get_db_connection()
@@ -112,6 +1369,27 @@ def view_users():
         cursor.close()
         conn.close()
     
+USER_COLUMNS = [
+    'user_type', 'user_name', 'password', 'consultant_type', 'reporting_manager',
+    'alternate_mobile', 'worksnap_credentials', 'status', 'timesheet_notification',
+    'name', 'mobile', 'office_email', 'joining_date', 'position', 'date_of_birth',
+    'anniversary_date', 'sap_server_credentials', 'allow_backdated_timesheet'
+]
+INSERT_USER_SQL = """
+INSERT INTO users (
+    user_type, user_name, password, consultant_type, reporting_manager,
+    alternate_mobile, worksnap_credentials, status, timesheet_notification,
+    name, mobile, office_email, joining_date, position, date_of_birth,
+    anniversary_date, sap_server_credentials, allow_backdated_timesheet
+) VALUES (
+    %(user_type)s, %(user_name)s, %(password)s, %(consultant_type)s, %(reporting_manager)s,
+    %(alternate_mobile)s, %(worksnap_credentials)s, %(status)s, %(timesheet_notification)s,
+    %(name)s, %(mobile)s, %(office_email)s, %(joining_date)s, %(position)s, %(date_of_birth)s,
+    %(anniversary_date)s, %(sap_server_credentials)s, %(allow_backdated_timesheet)s
+)
+"""
+USER_DATE_COLUMNS = ('joining_date', 'date_of_birth', 'anniversary_date')
+
 @users_bp.route('/submit_user', methods=['POST'])
 def submit_user():
     """Handles the form submission and inserts data into the database."""
@@ -144,22 +1422,11 @@ def submit_user():
             return redirect(url_for('users.index'))
 
         cursor = conn.cursor()
-        sql = """
-        INSERT INTO users (
-            user_type, user_name, password, consultant_type, reporting_manager,
-            alternate_mobile, worksnap_credentials, status, timesheet_notification,
-            name, mobile, office_email, joining_date, position, date_of_birth,
-            anniversary_date, sap_server_credentials, allow_backdated_timesheet
-        ) VALUES (
-            %(user_type)s, %(user_name)s, %(password)s, %(consultant_type)s, %(reporting_manager)s,
-            %(alternate_mobile)s, %(worksnap_credentials)s, %(status)s, %(timesheet_notification)s,
-            %(name)s, %(mobile)s, %(office_email)s, %(joining_date)s, %(position)s, %(date_of_birth)s,
-            %(anniversary_date)s, %(sap_server_credentials)s, %(allow_backdated_timesheet)s
-        )
-        """
         try:
-            cursor.execute(sql, user_data)
+            cursor.execute(INSERT_USER_SQL, user_data)
             conn.commit()
+            reference_data.invalidate()
+            table_versions.bump('users')
             flash(f"User '{user_data.get('name')}' was added successfully!", 'success')
             return redirect(url_for('users.view_users'))
         except mysql.connector.Error as err:
@@ -176,6 +1443,34 @@ def submit_user():
 
     return redirect(url_for('users.index'))
 
+def validate_user_import_row(row):
+    """Turns an imported spreadsheet row into INSERT_USER_SQL params (password still in plain text)."""
+    user_data = {column: import_value(row, column) for column in USER_COLUMNS}
+    user_data['user_type'] = import_choice(row, 'user_type', ('Admin', 'Consultant', 'Customer'), required=True)
+    for column in ('user_name', 'password', 'name'):
+        user_data[column] = import_value(row, column, required=True)
+    for column in USER_DATE_COLUMNS:
+        user_data[column] = import_date(row, column)
+    user_data['status'] = user_data['status'] or 'Active'
+    return user_data
+
+def hash_imported_passwords(chunk):
+    for user_data, hashed in zip(chunk, hash_passwords([u['password'] for u in chunk])):
+        user_data['password'] = hashed
+
+@users_bp.route('/import_users', methods=['POST'])
+@login_required
+@roles_required('Admin')
+def import_users():
+    """
+    Bulk-creates users from an uploaded CSV/XLSX file ('file' field) whose header row
+    uses the users column names. Returns a JSON report with per-row errors.
+    """
+    def imported():
+        reference_data.invalidate()
+        table_versions.bump('users')
+    return handle_import_upload(validate_user_import_row, INSERT_USER_SQL, hash_imported_passwords, imported)
+
 @users_bp.route('/edit_user/<int:user_id>')
 def edit_user(user_id):
     """Fetches a single user's data and managers, then renders the form for editing."""
@@ -195,8 +1490,7 @@ def edit_user(user_id):
             flash("User not found.", 'danger')
             return redirect(url_for('users.view_users'))
 
-        cursor.execute("SELECT id, name FROM users WHERE position IN ('Manager', 'Senior') ORDER BY name")
-        managers = cursor.fetchall()
+        managers = reference_data.get('managers', cursor)
 
     except mysql.connector.Error as err:
         app.logger.error(f"Failed to fetch user {user_id} or managers. Error: {err}")
@@ -240,7 +1534,18 @@ def update_user(user_id):
 
         try:
             cursor.execute(sql, tuple(val))
+            # Refresh the assignee display cache on tickets in case the name changed
+            cursor.execute(
+                "UPDATE tickets t SET t.assigned_to_user_name = ("
+                "SELECT GROUP_CONCAT(u.name ORDER BY u.name SEPARATOR ', ') FROM ticket_assignees ta "
+                "JOIN users u ON u.id = ta.user_id WHERE ta.ticket_id = t.id) "
+                "WHERE t.id IN (SELECT ticket_id FROM ticket_assignees WHERE user_id = %s)",
+                (user_id,)
+            )
             conn.commit()
+            invalidate_user(user_id)
+            reference_data.invalidate()
+            table_versions.bump('users', 'tickets')
             flash("User updated successfully!", 'success')
             return redirect(url_for('users.view_users'))
         except mysql.connector.Error as err:
@@ -264,8 +1569,20 @@ def delete_user(user_id):
 
     cursor = conn.cursor()
     try:
+        # Drop the user from the assignee display string of their tickets; the
+        # ticket_assignees rows themselves go with the user (ON DELETE CASCADE)
+        cursor.execute(
+            "UPDATE tickets t SET t.assigned_to_user_name = ("
+            "SELECT GROUP_CONCAT(u.name ORDER BY u.name SEPARATOR ', ') FROM ticket_assignees ta "
+            "JOIN users u ON u.id = ta.user_id WHERE ta.ticket_id = t.id AND ta.user_id <> %s) "
+            "WHERE t.id IN (SELECT ticket_id FROM ticket_assignees WHERE user_id = %s)",
+            (user_id, user_id)
+        )
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         conn.commit()
+        invalidate_user(user_id)
+        reference_data.invalidate()
+        table_versions.bump('users', 'tickets')
         if cursor.rowcount == 0:
             return jsonify({'error': 'User not found'}), 404
         flash("User has been deleted.", 'success')
@@ -285,9 +1602,9 @@ def attendance():
     cursor = conn.cursor(dictionary=True)
     today = date.today()
     now = datetime.now()
-    cursor.execute("SELECT * FROM attendance WHERE user_id = %s AND date = %s", (current_user.id, today))
+    cursor.execute("SELECT date, check_in, check_out FROM attendance WHERE user_id = %s AND date = %s", (current_user.id, today))
     today_attendance = cursor.fetchone()
-    cursor.execute("SELECT * FROM attendance WHERE user_id = %s ORDER BY date DESC LIMIT 7", (current_user.id,))
+    cursor.execute("SELECT date, check_in, check_out FROM attendance WHERE user_id = %s ORDER BY date DESC LIMIT 7", (current_user.id,))
     attendance_records = cursor.fetchall()
     cursor.close()
     conn.close()
@@ -302,86 +1619,715 @@ def attendance():
 @users_bp.route('/attendance/check_in', methods=['POST'])
 @login_required
 def check_in():
+    """
+    Records today's check-in with a single upsert on the (user_id, date) unique key.
+    An existing check-in is kept (COALESCE), so double clicks and concurrent requests
+    cannot create a second row or move the time.
+    """
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    if conn is None:
+        return jsonify({'success': False, 'message': 'Database connection failed.'}), 500
+    cursor = conn.cursor()
     now = datetime.now()
     today = now.date()
-    cursor.execute("SELECT * FROM attendance WHERE user_id = %s AND date = %s", (current_user.id, today))
-    record = cursor.fetchone()
-    if record and record['check_in']:
+    try:
+        cursor.execute(
+            "INSERT INTO attendance (user_id, date, check_in) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE check_in = COALESCE(check_in, VALUES(check_in))",
+            (current_user.id, today, now)
+        )
+        # Affected rows: 1 = new row, 2 = existing row got its check-in, 0 = already checked in
+        checked_in = cursor.rowcount > 0
+        if checked_in:
+            late_after = datetime.strptime(app.config['ATTENDANCE_LATE_AFTER'], '%H:%M').time()
+            cursor.execute(
+                "INSERT INTO attendance_monthly (user_id, month, days_present, late_days, weekday_days) "
+                "VALUES (%s, %s, 1, %s, %s) "
+                "ON DUPLICATE KEY UPDATE days_present = days_present + 1, late_days = late_days + VALUES(late_days), "
+                "weekday_days = weekday_days + VALUES(weekday_days)",
+                (current_user.id, today.replace(day=1), int(now.time() > late_after), int(today.weekday() < 5))
+            )
+        conn.commit()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        app.logger.error(f"Failed to check in user {current_user.id}. Error: {err}")
+        return jsonify({'success': False, 'message': 'Database error.'}), 500
+    finally:
         cursor.close()
         conn.close()
+    if not checked_in:
         return jsonify({'success': False, 'message': 'Already checked in today.'}), 400
-    if record:
-        cursor.execute("UPDATE attendance SET check_in = %s WHERE user_id = %s AND date = %s", (now, current_user.id, today))
-    else:
-        cursor.execute("INSERT INTO attendance (user_id, check_in, date) VALUES (%s, %s, %s)", (current_user.id, now, today))
-    conn.commit()
-    cursor.close()
-    conn.close()
     return jsonify({'success': True, 'check_in': now.strftime('%H:%M:%S')})
 
 @users_bp.route('/attendance/check_out', methods=['POST'])
 @login_required
 def check_out():
+    """Records today's check-out with one conditional UPDATE; the row is only read back to explain a refusal."""
     conn = get_db_connection()
+    if conn is None:
+        return jsonify({'success': False, 'message': 'Database connection failed.'}), 500
     cursor = conn.cursor(dictionary=True)
     now = datetime.now()
     today = now.date()
-    cursor.execute("SELECT * FROM attendance WHERE user_id = %s AND date = %s", (current_user.id, today))
-    record = cursor.fetchone()
-    if not record or not record['check_in']:
+    try:
+        cursor.execute(
+            "UPDATE attendance SET check_out = %s "
+            "WHERE user_id = %s AND date = %s AND check_in IS NOT NULL AND check_out IS NULL",
+            (now, current_user.id, today)
+        )
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT check_in, check_out FROM attendance WHERE user_id = %s AND date = %s",
+                           (current_user.id, today))
+            record = cursor.fetchone()
+            if not record or not record['check_in']:
+                return jsonify({'success': False, 'message': 'Check in first.'}), 400
+            return jsonify({'success': False, 'message': 'Already checked out today.'}), 400
+        cursor.execute(
+            "INSERT INTO attendance_monthly (user_id, month, days_checked_out, worked_seconds) "
+            "SELECT user_id, %s, 1, TIMESTAMPDIFF(SECOND, check_in, check_out) FROM attendance "
+            "WHERE user_id = %s AND date = %s "
+            "ON DUPLICATE KEY UPDATE days_checked_out = days_checked_out + 1, "
+            "worked_seconds = worked_seconds + VALUES(worked_seconds)",
+            (today.replace(day=1), current_user.id, today)
+        )
+        conn.commit()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        app.logger.error(f"Failed to check out user {current_user.id}. Error: {err}")
+        return jsonify({'success': False, 'message': 'Database error.'}), 500
+    finally:
         cursor.close()
         conn.close()
-        return jsonify({'success': False, 'message': 'Check in first.'}), 400
-    if record['check_out']:
+    return jsonify({'success': True, 'check_out': now.strftime('%H:%M:%S')})
+
+@users_bp.route('/attendance/report')
+@login_required
+@roles_required('Admin')
+def attendance_report():
+    """
+    Monthly timesheet report (?month=YYYY-MM, default current month) built from the
+    attendance_monthly rollups, the holiday calendar and leave requests, so its cost
+    grows with the number of users rather than with raw attendance rows. Absences are
+    the working days (weekdays that are not holidays) with neither a check-in nor a
+    leave request linked to the user. Check-ins on working days come from the
+    rollup's weekday count, less the check-ins on weekday holidays and on leave days:
+    raw attendance rows are read only for those few dates.
+    """
+    try:
+        month_start = datetime.strptime(request.args.get('month', date.today().strftime('%Y-%m')), '%Y-%m').date()
+    except ValueError:
+        return jsonify({'error': 'month must be in YYYY-MM format.'}), 400
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    today = date.today()
+    period_end = min(next_month - timedelta(days=1), today)
+
+    try:
+        holidays = holiday_calendar.between(month_start, next_month - timedelta(days=1))
+    except mysql.connector.Error as err:
+        app.logger.error(f"Failed to load holidays for attendance report. Error: {err}")
+        return jsonify({'error': 'An internal error occurred.'}), 500
+    holiday_dates = {h['holiday_date'] for h in holidays}
+
+    working_days = set()
+    day = month_start
+    while day <= period_end:
+        if day.weekday() < 5 and day not in holiday_dates:
+            working_days.add(day)
+        day += timedelta(days=1)
+
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify({'error': 'Database connection failed'}), 500
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT u.id AS user_id, u.name, COALESCE(m.days_present, 0) AS days_present, "
+            "COALESCE(m.weekday_days, 0) AS weekday_days, "
+            "COALESCE(m.days_checked_out, 0) AS days_checked_out, COALESCE(m.late_days, 0) AS late_days, "
+            "COALESCE(m.worked_seconds, 0) AS worked_seconds "
+            "FROM users u LEFT JOIN attendance_monthly m ON m.user_id = u.id AND m.month = %s "
+            "WHERE u.user_type IN ('Admin', 'Consultant') ORDER BY u.name",
+            (month_start,)
+        )
+        users = cursor.fetchall()
+
+        # Weekday check-ins that do not count as working-day attendance: on holidays,
+        # and on leave days (those count as leave)
+        not_working = {}
+        weekday_holidays = sorted(d for d in holiday_dates if month_start <= d <= period_end and d.weekday() < 5)
+        if weekday_holidays:
+            placeholders = ', '.join(['%s'] * len(weekday_holidays))
+            cursor.execute(
+                "SELECT a.user_id, COUNT(*) AS days FROM users u "
+                f"JOIN attendance a ON a.user_id = u.id AND a.date IN ({placeholders}) "
+                "WHERE u.user_type IN ('Admin', 'Consultant') AND a.check_in IS NOT NULL GROUP BY a.user_id",
+                tuple(weekday_holidays)
+            )
+            not_working = {row['user_id']: row['days'] for row in cursor.fetchall()}
+
+        leave_days = {}
+        if working_days:
+            placeholders = ', '.join(['%s'] * len(working_days))
+            cursor.execute(
+                "SELECT l.user_id, COUNT(DISTINCT l.leave_date) AS days, COUNT(DISTINCT a.date) AS present "
+                "FROM leave_requests l LEFT JOIN attendance a "
+                "ON a.user_id = l.user_id AND a.date = l.leave_date AND a.check_in IS NOT NULL "
+                f"WHERE l.user_id IS NOT NULL AND l.leave_date IN ({placeholders}) GROUP BY l.user_id",
+                tuple(sorted(working_days))
+            )
+            for row in cursor.fetchall():
+                leave_days[row['user_id']] = row['days']
+                not_working[row['user_id']] = not_working.get(row['user_id'], 0) + row['present']
+
+        open_today = set()
+        if month_start <= today < next_month:
+            # Today's check-ins without a check-out are still in progress, not missing
+            cursor.execute("SELECT user_id FROM attendance WHERE date = %s AND check_out IS NULL", (today,))
+            open_today = {row['user_id'] for row in cursor.fetchall()}
+    except mysql.connector.Error as err:
+        app.logger.error(f"Failed to build attendance report. Error: {err}")
+        return jsonify({'error': 'An internal error occurred.'}), 500
+    finally:
         cursor.close()
         conn.close()
-        return jsonify({'success': False, 'message': 'Already checked out today.'}), 400
-    cursor.execute("UPDATE attendance SET check_out = %s WHERE user_id = %s AND date = %s", (now, current_user.id, today))
-    conn.commit()
-    cursor.close()
-    conn.close()
-    return jsonify({'success': True, 'check_out': now.strftime('%H:%M:%S')})
+
+    report = []
+    for user in users:
+        on_leave = leave_days.get(user['user_id'], 0)
+        present = user['weekday_days'] - not_working.get(user['user_id'], 0)
+        report.append({
+            'user_id': user['user_id'],
+            'name': user['name'],
+            'days_present': user['days_present'],
+            'late_days': user['late_days'],
+            'missing_check_outs': max(user['days_present'] - user['days_checked_out']
+                                      - (1 if user['user_id'] in open_today else 0), 0),
+            'leave_days': on_leave,
+            'absent_days': max(len(working_days) - present - on_leave, 0),
+            'worked_hours': round(user['worked_seconds'] / 3600, 2),
+        })
+
+    return jsonify({
+        'month': month_start.strftime('%Y-%m'),
+        'working_days': len(working_days),
+        'holidays': [{'date': h['form_date'], 'name': h['name']} for h in holidays],
+        'users': report,
+    })
+
+@users_bp.route('/attendance/export.csv')
+@login_required
+@roles_required('Admin')
+def export_attendance():
+    """
+    Streams attendance as CSV. Accepts the listing date filters (filter_type,
+    start_date, end_date) and an optional user_id.
+    """
+    start_date, end_date = resolve_date_filter(request.args.get('filter_type', 'all'),
+                                               request.args.get('start_date'), request.args.get('end_date'))
+    where_clause, params = date_range_clause('a.date', start_date, end_date)
+    where_clauses = [where_clause] if where_clause else []
+    user_id = request.args.get('user_id', type=int)
+    if user_id:
+        where_clauses.append("a.user_id = %s")
+        params.append(user_id)
+
+    sql_query = """
+    SELECT a.date, a.user_id, u.name, a.check_in, a.check_out
+    FROM attendance a JOIN users u ON u.id = a.user_id
+    """
+    if where_clauses:
+        sql_query += " WHERE " + " AND ".join(where_clauses)
+    sql_query += " ORDER BY a.date, a.user_id"
+    return export_query(sql_query, params, f"attendance-{date.today()}.csv")
 
 # --- Blueprint for Ticket Management ---
 tickets_bp = Blueprint('tickets', __name__, template_folder='html')
 
+ticket_summary_cache = TTLCache(1, app.config['TICKET_SUMMARY_TTL'])
+
+def invalidate_ticket_summary():
+    """Forces the next dashboard load to recompute ticket counts."""
+    ticket_summary_cache.clear()
+
+def get_ticket_summary():
+    """
+    Returns ticket counts per status, priority, customer and week, computed with
+    GROUP BY queries and cached for TICKET_SUMMARY_TTL seconds. Returns None if the
+    database cannot be reached.
+    """
+    summary = ticket_summary_cache.get('summary')
+    if summary is not None:
+        return summary
+
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    today = date.today()
+    first_week = today - timedelta(days=today.weekday(), weeks=app.config['TICKET_SUMMARY_WEEKS'] - 1)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT status, COUNT(*) AS count FROM tickets GROUP BY status")
+        by_status = {row['status']: row['count'] for row in cursor.fetchall()}
+
+        cursor.execute("SELECT priority, COUNT(*) AS count FROM tickets GROUP BY priority")
+        by_priority = {row['priority']: row['count'] for row in cursor.fetchall()}
+
+        cursor.execute("SELECT customer, COUNT(*) AS count FROM tickets GROUP BY customer ORDER BY count DESC")
+        by_customer = cursor.fetchall()
+
+        cursor.execute(
+            "SELECT DATE_SUB(DATE(created_at), INTERVAL WEEKDAY(created_at) DAY) AS week_start, COUNT(*) AS count "
+            "FROM tickets WHERE created_at >= %s GROUP BY week_start",
+            (first_week,)
+        )
+        week_counts = {str(row['week_start']): row['count'] for row in cursor.fetchall()}
+    except mysql.connector.Error as err:
+        app.logger.error(f"Failed to compute ticket summary. Error: {err}")
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+    by_week = []
+    for offset in range(app.config['TICKET_SUMMARY_WEEKS']):
+        week_start = str(first_week + timedelta(weeks=offset))
+        by_week.append({'week_start': week_start, 'count': week_counts.get(week_start, 0)})
+
+    summary = {
+        'total': sum(by_status.values()),
+        'status': by_status,
+        'priority': by_priority,
+        'customer': by_customer,
+        'week': by_week,
+    }
+    ticket_summary_cache.set('summary', summary)
+    return summary
+
 # Ticket management
 @tickets_bp.route('/dashboard')
 @login_required
 @roles_required('Admin', 'Consultant', 'Customer')
 def dashboard():
-    """Fetches all tickets from the database and displays them on the dashboard."""
-    conn = get_db_connection()
+    """Renders the dashboard with aggregate ticket counts; the ticket table is paged in via the API."""
+    summary = get_ticket_summary()
+    if summary is None:
+        flash("Failed to load ticket data for dashboard. An error occurred.", 'danger')
+        summary = {'total': 0, 'status': {}, 'priority': {}, 'customer': [], 'week': []}
+
+    return render_template('dashboard.html', summary=summary,
+                           can_export=current_user.user_type in TICKET_EXPORT_ROLES)
+
+@tickets_bp.route('/api/summary')
+@login_required
+@roles_required('Admin', 'Consultant', 'Customer')
+def api_ticket_summary():
+    """Returns the cached ticket counts per status, priority, customer and week as JSON."""
+    summary = get_ticket_summary()
+    if summary is None:
+        return jsonify({'error': 'Failed to compute ticket summary.'}), 500
+    return jsonify(summary)
+
+SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+def search_terms(text):
+    """Splits text into the lowercase word tokens used by the in-memory ticket index."""
+    return SEARCH_TOKEN_RE.findall((text or '').lower())
+
+class TicketSearchIndex:
+    """
+    Per-process inverted index over ticket subjects and descriptions, used when the
+    database has no FULLTEXT index (TICKET_SEARCH_BACKEND = 'memory'). Built from the
+    tickets table on first use and rebuilt when table_versions reports a change to
+    tickets it has not seen (another worker's edit), or after `ttl` seconds.
+    submit_ticket, update_ticket and the assignment endpoints apply their own edits
+    in place, passing the (before, after) versions of their bump, so those do not
+    cost a rebuild. Queries match tickets containing every term and rank them by TF-IDF.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._postings = {}   # term -> {ticket_id: term frequency}
+        self._docs = {}       # ticket_id -> (status, customer, terms)
+        self._expires_at = 0
+        self._table_version = None
+
+    def _load(self):
+        conn = get_db_connection()
+        if conn is None:
+            raise mysql.connector.errors.InterfaceError("Database connection failed")
+        postings, docs = {}, {}
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT id, subject, description, status, customer FROM tickets")
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for row in rows:
+                    self._add(postings, docs, row['id'], row['subject'], row['description'],
+                              row['status'], row['customer'])
+        finally:
+            cursor.close()
+            conn.close()
+        return postings, docs
+
+    @staticmethod
+    def _add(postings, docs, ticket_id, subject, description, status, customer):
+        counts = {}
+        for term in search_terms(subject) + search_terms(description):
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            postings.setdefault(term, {})[ticket_id] = count
+        docs[ticket_id] = (status, customer, tuple(counts))
+
+    def _discard(self, ticket_id):
+        doc = self._docs.pop(ticket_id, None)
+        if doc is None:
+            return
+        for term in doc[2]:
+            ticket_ids = self._postings.get(term)
+            if ticket_ids is not None:
+                ticket_ids.pop(ticket_id, None)
+                if not ticket_ids:
+                    del self._postings[term]
+
+    def _ensure_loaded(self):
+        table_version = table_versions.get('tickets')
+        if table_version == self._table_version and time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if table_version == self._table_version and time.monotonic() < self._expires_at:
+                return
+            self._postings, self._docs = self._load()
+            self._table_version = table_version
+            self._expires_at = time.monotonic() + self.ttl
+
+    def _advance(self, versions):
+        """Marks the index current after the caller's own bump, if nothing else changed tickets since the build."""
+        before, after = versions
+        if self._table_version == before:
+            self._table_version = after
+
+    def update(self, ticket_id, subject, description, status, customer, versions):
+        """
+        Indexes a new or edited ticket; `versions` is what table_versions.bump('tickets')
+        returned for the write. A no-op until the index has been built.
+        """
+        with self._lock:
+            if not self._expires_at:
+                return
+            self._discard(ticket_id)
+            self._add(self._postings, self._docs, ticket_id, subject, description, status, customer)
+            self._advance(versions)
+
+    def update_status(self, ticket_ids, status, versions):
+        """Records a status change (e.g. assignment) so the status facet stays correct."""
+        with self._lock:
+            for ticket_id in ticket_ids:
+                doc = self._docs.get(ticket_id)
+                if doc is not None:
+                    self._docs[ticket_id] = (status, doc[1], doc[2])
+            self._advance(versions)
+
+    def search(self, query, status=None, customer=None):
+        """
+        Returns (ranked [(ticket_id, score)], status facet, customer facet) for tickets
+        matching every term of `query`. Each facet is counted with the other facet's
+        filter applied, so the counts show what selecting a value would return.
+        """
+        self._ensure_loaded()
+        terms = list(dict.fromkeys(search_terms(query)))
+        with self._lock:
+            matches = [self._postings.get(term) for term in terms]
+            if not terms or not all(matches):
+                return [], {}, {}
+            matches.sort(key=len)
+            total_docs = len(self._docs)
+            weights = [(ticket_ids, math.log(1 + total_docs / len(ticket_ids))) for ticket_ids in matches]
+
+            ranked, status_facet, customer_facet = [], {}, {}
+            for ticket_id in matches[0]:
+                if not all(ticket_id in ticket_ids for ticket_ids in matches[1:]):
+                    continue
+                doc_status, doc_customer = self._docs[ticket_id][:2]
+                if customer is None or doc_customer == customer:
+                    status_facet[doc_status] = status_facet.get(doc_status, 0) + 1
+                if status is None or doc_status == status:
+                    customer_facet[doc_customer] = customer_facet.get(doc_customer, 0) + 1
+                    if customer is None or doc_customer == customer:
+                        score = sum(ticket_ids[ticket_id] * idf for ticket_ids, idf in weights)
+                        ranked.append((ticket_id, score))
+
+        ranked.sort(key=lambda item: (-item[1], -item[0]))
+        return ranked, status_facet, customer_facet
+
+    def invalidate(self):
+        self._expires_at = 0
+
+ticket_search_index = TicketSearchIndex(app.config['TICKET_SEARCH_INDEX_TTL'])
+
+TICKET_SEARCH_COLUMNS = "id, ticket_number, customer, subject AS task, priority, status"
+
+def search_tickets_fulltext(cursor, query, status, customer, limit, offset):
+    """Runs a ranked FULLTEXT search; returns (tickets, status facet, customer facet)."""
+    match = "MATCH(subject, description) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+    filters = {'status': status, 'customer': customer}
+
+    def where(*columns):
+        clauses, params = [match], [query]
+        for column in columns:
+            if filters[column] is not None:
+                clauses.append(f"{column} = %s")
+                params.append(filters[column])
+        return " AND ".join(clauses), params
+
+    clause, params = where('status', 'customer')
+    cursor.execute(
+        f"SELECT {TICKET_SEARCH_COLUMNS}, {match} AS score FROM tickets WHERE {clause} "
+        "ORDER BY score DESC, id DESC LIMIT %s OFFSET %s",
+        (query, *params, limit, offset)
+    )
+    tickets = cursor.fetchall()
+
+    clause, params = where('customer')
+    cursor.execute(f"SELECT status, COUNT(*) AS count FROM tickets WHERE {clause} GROUP BY status", tuple(params))
+    status_facet = {row['status']: row['count'] for row in cursor.fetchall()}
+
+    clause, params = where('status')
+    cursor.execute(f"SELECT customer, COUNT(*) AS count FROM tickets WHERE {clause} GROUP BY customer", tuple(params))
+    customer_facet = {row['customer']: row['count'] for row in cursor.fetchall()}
+    return tickets, status_facet, customer_facet
+
+def search_tickets_in_memory(cursor, query, status, customer, limit, offset):
+    """Ranks tickets with ticket_search_index and loads the requested page from the database."""
+    ranked, status_facet, customer_facet = ticket_search_index.search(query, status, customer)
+    page = ranked[offset:offset + limit]
+    if not page:
+        return [], status_facet, customer_facet
+
+    placeholders = ', '.join(['%s'] * len(page))
+    cursor.execute(f"SELECT {TICKET_SEARCH_COLUMNS} FROM tickets WHERE id IN ({placeholders})",
+                   tuple(ticket_id for ticket_id, _ in page))
+    rows = {row['id']: row for row in cursor.fetchall()}
     tickets = []
+    for ticket_id, score in page:
+        if ticket_id in rows:
+            rows[ticket_id]['score'] = score
+            tickets.append(rows[ticket_id])
+    return tickets, status_facet, customer_facet
+
+@tickets_bp.route('/api/search')
+@login_required
+@roles_required('Admin', 'Consultant', 'Customer')
+def search_tickets():
+    """
+    Full-text search over ticket subjects and descriptions, best match first.
+    Query args: q (required), status and customer (exact filters), page and limit.
+    The response carries status and customer facet counts for the query.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query.'}), 400
+    status = request.args.get('status') or None
+    customer = request.args.get('customer') or None
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', TICKET_PAGE_SIZE, type=int), 1), TICKET_PAGE_SIZE_MAX)
+    offset = (page - 1) * limit
+
+    if app.config['TICKET_SEARCH_BACKEND'] == 'memory':
+        search = search_tickets_in_memory
+    else:
+        search = search_tickets_fulltext
+
+    conn = get_db_connection()
     if conn is None:
-        flash("Database connection failed! Cannot retrieve ticket data for dashboard.", 'danger')
-        return render_template('dashboard.html', tickets=[])
+        return jsonify({'error': 'Database connection failed'}), 500
 
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT id, ticket_number, customer, subject AS task, priority, status FROM tickets")
-        tickets = cursor.fetchall()
-        
-        for ticket in tickets:
-            if 'delivery_date' not in ticket or ticket['delivery_date'] is None:
-                ticket['deliveryDate'] = 'N/A'
-            if 'task' not in ticket and 'subject' in ticket:
-                ticket['task'] = ticket['subject']
+        tickets, status_facet, customer_facet = search(cursor, query, status, customer, limit, offset)
+    except mysql.connector.Error as err:
+        app.logger.error(f"Ticket search for {query!r} failed. Error: {err}")
+        return jsonify({'error': 'An internal error occurred.'}), 500
+    finally:
+        cursor.close()
+        conn.close()
 
+    total = status_facet.get(status, 0) if status else sum(status_facet.values())
+    for ticket in tickets:
+        ticket['score'] = round(float(ticket['score']), 4)
+    customers = sorted(customer_facet.items(), key=lambda item: (-item[1], str(item[0])))
+    return jsonify({
+        'tickets': tickets,
+        'total': total,
+        'page': page,
+        'has_more': offset + len(tickets) < total,
+        'facets': {
+            'status': status_facet,
+            'customer': [{'customer': name, 'count': count}
+                         for name, count in customers[:app.config['TICKET_SEARCH_FACET_LIMIT']]],
+        },
+    })
+
+TICKET_NUMBER_SEQUENCE = 'ticket_number'
+
+def allocate_ticket_number(cursor):
+    """
+    Reserves the next ticket number from the counters table in O(1). The counter row
+    stays locked until the caller commits, so concurrent submissions never share a
+    number, and a rollback hands the number back. On first use the counter is seeded
+    from the highest existing ticket number so numbering continues where it left off.
+    """
+    increment = "UPDATE counters SET value = LAST_INSERT_ID(value + 1) WHERE name = %s"
+    cursor.execute(increment, (TICKET_NUMBER_SEQUENCE,))
+    if cursor.rowcount == 0:
+        cursor.execute(
+            "INSERT IGNORE INTO counters (name, value) "
+            "SELECT %s, COALESCE(MAX(CAST(ticket_number AS UNSIGNED)), 0) FROM tickets",
+            (TICKET_NUMBER_SEQUENCE,)
+        )
+        cursor.execute(increment, (TICKET_NUMBER_SEQUENCE,))
+    return cursor.lastrowid
+
+def peek_ticket_number(cursor):
+    """Returns the number the next ticket will most likely get, without reserving it."""
+    cursor.execute("SELECT value + 1 AS next_value FROM counters WHERE name = %s", (TICKET_NUMBER_SEQUENCE,))
+    row = cursor.fetchone()
+    if row is None:
+        # Counter not seeded yet; the first allocation will seed it from this same value
+        cursor.execute("SELECT COALESCE(MAX(CAST(ticket_number AS UNSIGNED)), 0) + 1 AS next_value FROM tickets")
+        row = cursor.fetchone()
+    return int(row['next_value'])
+
+TICKET_SORT_COLUMNS = ('id', 'ticket_number')
+TICKET_FILTER_COLUMNS = ('status', 'priority', 'customer')
+TICKET_PAGE_SIZE = 50
+TICKET_PAGE_SIZE_MAX = 200
+TICKET_EXPORT_ROLES = ('Admin', 'Consultant')  # customers see the dashboard but cannot export
+
+def encode_page_cursor(values):
+    """Packs the sort key of the last row on a page into an opaque URL-safe token."""
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+def decode_page_cursor(token):
+    """Reverses encode_page_cursor(); raises ValueError for tampered or malformed tokens."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Invalid cursor: {err}")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+@tickets_bp.route('/api/tickets')
+@login_required
+@roles_required('Admin', 'Consultant', 'Customer')
+def api_tickets():
+    """
+    Returns one page of tickets as JSON using keyset pagination.
+    Query args: status, priority, customer (exact filters), sort ('id' or 'ticket_number'),
+    order ('asc' or 'desc'), limit, and cursor (the next_cursor of the previous page).
+    """
+    sort = request.args.get('sort', 'id')
+    order = request.args.get('order', 'asc').lower()
+    if sort not in TICKET_SORT_COLUMNS or order not in ('asc', 'desc'):
+        return jsonify({'error': 'Invalid sort or order.'}), 400
+    limit = min(max(request.args.get('limit', TICKET_PAGE_SIZE, type=int), 1), TICKET_PAGE_SIZE_MAX)
+
+    where_clauses = []
+    params = []
+    for column in TICKET_FILTER_COLUMNS:
+        value = request.args.get(column)
+        if value:
+            where_clauses.append(f"{column} = %s")
+            params.append(value)
+
+    cursor_token = request.args.get('cursor')
+    if cursor_token:
+        try:
+            last_value, last_id = decode_page_cursor(cursor_token)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor.'}), 400
+        op = '>' if order == 'asc' else '<'
+        if sort == 'id':
+            where_clauses.append(f"id {op} %s")
+            params.append(last_id)
+        else:
+            where_clauses.append(f"({sort} {op} %s OR ({sort} = %s AND id {op} %s))")
+            params.extend([last_value, last_value, last_id])
+
+    sql_query = "SELECT id, ticket_number, customer, subject AS task, priority, status FROM tickets"
+    if where_clauses:
+        sql_query += " WHERE " + " AND ".join(where_clauses)
+    if sort == 'id':
+        sql_query += f" ORDER BY id {order.upper()}"
+    else:
+        sql_query += f" ORDER BY {sort} {order.upper()}, id {order.upper()}"
+    sql_query += " LIMIT %s"
+    params.append(limit + 1)  # one extra row tells us whether another page exists
+
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql_query, tuple(params))
+        tickets = cursor.fetchall()
     except mysql.connector.Error as err:
-        app.logger.error(f"Failed to fetch tickets for dashboard. Error: {err}")
-        flash("Failed to load ticket data for dashboard. An error occurred.", 'danger')
+        app.logger.error(f"Failed to fetch ticket page. Error: {err}")
+        return jsonify({'error': 'An internal error occurred.'}), 500
     finally:
         cursor.close()
         conn.close()
 
-    return render_template('dashboard.html', tickets=tickets)
+    has_more = len(tickets) > limit
+    tickets = tickets[:limit]
+    next_cursor = None
+    if has_more:
+        last = tickets[-1]
+        next_cursor = encode_page_cursor([last[sort], last['id']])
+
+    return jsonify({'tickets': tickets, 'next_cursor': next_cursor, 'has_more': has_more})
+
+@tickets_bp.route('/export.csv')
+@login_required
+@roles_required(*TICKET_EXPORT_ROLES)
+def export_tickets():
+    """
+    Streams tickets as CSV. Accepts status/priority/customer filters and the listing
+    date filters (filter_type, start_date, end_date) applied to the creation date.
+    """
+    where_clauses = []
+    params = []
+    for column in TICKET_FILTER_COLUMNS:
+        value = request.args.get(column)
+        if value:
+            where_clauses.append(f"{column} = %s")
+            params.append(value)
+    start_date, end_date = resolve_date_filter(request.args.get('filter_type', 'all'),
+                                               request.args.get('start_date'), request.args.get('end_date'))
+    where_clause, range_params = date_range_clause('created_at', *day_bounds(start_date, end_date))
+    if where_clause:
+        where_clauses.append(where_clause)
+        params.extend(range_params)
+
+    sql_query = """
+    SELECT ticket_number, customer, module, status, form_type, priority, subject,
+           task_given_by, approved_hours, assigned_to_user_name, created_at
+    FROM tickets
+    """
+    if where_clauses:
+        sql_query += " WHERE " + " AND ".join(where_clauses)
+    sql_query += " ORDER BY id"
+    return export_query(sql_query, params, f"tickets-{date.today()}.csv")
 
 @tickets_bp.route('/assign_tickets')
 @login_required
 @roles_required('Admin', 'Consultant', 'Customer')
+@conditional_page('tickets', 'users')
 def assign_tickets():
     """
     Fetches open and assigned tickets, and a list of admins/consultants
@@ -399,16 +2345,15 @@ def assign_tickets():
     cursor = conn.cursor(dictionary=True)
     try:
         # Fetch OPEN tickets
-        cursor.execute("SELECT id, ticket_number, subject, customer, status, assigned_to_user_name FROM tickets WHERE status = 'Open' ORDER BY ticket_number ASC")
+        cursor.execute(f"SELECT {ASSIGNED_TICKET_COLUMNS} FROM tickets WHERE status = 'Open' ORDER BY ticket_number ASC")
         open_tickets = cursor.fetchall()
 
         # Fetch ASSIGNED tickets
-        cursor.execute("SELECT id, ticket_number, subject, customer, status, assigned_to_user_name FROM tickets WHERE status = 'Assigned' ORDER BY ticket_number ASC")
+        cursor.execute(f"SELECT {ASSIGNED_TICKET_COLUMNS} FROM tickets WHERE status = 'Assigned' ORDER BY ticket_number ASC")
         assigned_tickets = cursor.fetchall()
 
-        # Fetch users with user_type 'Admin' or 'Consultant'
-        cursor.execute("SELECT id, name, user_type FROM users WHERE user_type IN ('Admin', 'Consultant') ORDER BY name ASC")
-        assignees = cursor.fetchall()
+        # Users with user_type 'Admin' or 'Consultant'
+        assignees = reference_data.get('assignees', cursor)
 
     except mysql.connector.Error as err:
         app.logger.error(f"Database Error loading assign_tickets page: {err}")
@@ -435,15 +2380,10 @@ def new_task():
 
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("SELECT MAX(CAST(ticket_number AS UNSIGNED)) FROM tickets")
-        max_ticket = cursor.fetchone()['MAX(CAST(ticket_number AS UNSIGNED))']
-        if max_ticket is not None:
-            next_ticket_no = int(max_ticket) + 1
-        else:
-            next_ticket_no = 1
+        # Display only; the actual number is allocated when the ticket is inserted
+        next_ticket_no = peek_ticket_number(cursor)
 
-        cursor.execute("SELECT id, name, office_email FROM users WHERE user_type = 'customer' ORDER BY name")
-        customers = cursor.fetchall()
+        customers = reference_data.get('customers', cursor)
 
     except mysql.connector.Error as err:
         app.logger.error(f"Database Error in new_task route: {err}")
@@ -459,7 +2399,6 @@ def new_task():
 def submit_ticket():
     """Handles form submission, file upload, and database insertion."""
     ticket_data = {
-        'ticket_no': request.form.get('ticket_no'),
         'customer': request.form.get('customer'),
         'module': request.form.get('module'),
         'status': request.form.get('status'),
@@ -471,15 +2410,11 @@ def submit_ticket():
         'description': request.form.get('description')
     }
 
-    attachment_path = None
-    if 'attachment' in request.files:
-        file = request.files['attachment']
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            if not os.path.exists(app.config['UPLOAD_FOLDER']):
-                os.makedirs(app.config['UPLOAD_FOLDER'])
-            attachment_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(attachment_path)
+    attachment_name = attachment_path = attachment_size = attachment_sha256 = None
+    attachment = save_attachment()
+    if attachment:
+        attachment_name, stored = attachment
+        attachment_path, attachment_sha256, attachment_size = stored
 
     conn = get_db_connection()
     if not conn:
@@ -490,22 +2425,30 @@ def submit_ticket():
     sql_query = """
     INSERT INTO tickets (
         ticket_number, customer, module, status, form_type, priority,
-        subject, task_given_by, approved_hours, description, attachment_path
-    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        subject, task_given_by, approved_hours, description, attachment_path,
+        attachment_name, attachment_size, attachment_sha256
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
     """
-    values = (
-        ticket_data['ticket_no'], ticket_data['customer'], ticket_data['module'],
-        ticket_data['status'], ticket_data['form_type'], ticket_data['priority'],
-        ticket_data['subject'], ticket_data['task_given_by'],
-        ticket_data['approved_hours'], ticket_data['description'], attachment_path
-    )
 
     try:
+        ticket_number = allocate_ticket_number(cursor)
+        values = (
+            str(ticket_number), ticket_data['customer'], ticket_data['module'],
+            ticket_data['status'], ticket_data['form_type'], ticket_data['priority'],
+            ticket_data['subject'], ticket_data['task_given_by'],
+            ticket_data['approved_hours'], ticket_data['description'], attachment_path,
+            attachment_name, attachment_size, attachment_sha256
+        )
         cursor.execute(sql_query, values)
         conn.commit()
-        flash('Ticket submitted successfully!', 'success')
+        invalidate_ticket_summary()
+        versions = table_versions.bump('tickets')
+        ticket_search_index.update(cursor.lastrowid, ticket_data['subject'], ticket_data['description'],
+                                   ticket_data['status'], ticket_data['customer'], versions)
+        flash(f'Ticket #{ticket_number} submitted successfully!', 'success')
         return redirect(url_for('tickets.dashboard'))
     except mysql.connector.Error as err:
+        conn.rollback()
         app.logger.error(f"Database Error: {err}")
         flash(f'Failed to submit ticket. Database error: {err}', 'error')
         return redirect(url_for('tickets.new_task'))
@@ -533,8 +2476,7 @@ def edit_ticket(ticket_id):
             flash('Ticket not found!', 'error')
             return redirect(url_for('tickets.dashboard'))
 
-        cursor.execute("SELECT id, name FROM users WHERE user_type = 'customer' ORDER BY name")
-        customers = cursor.fetchall()
+        customers = reference_data.get('customers', cursor)
         
     except mysql.connector.Error as err:
         app.logger.error(f"Database Error fetching ticket for edit: {err}")
@@ -585,17 +2527,20 @@ def update_ticket(ticket_id):
 
     try:
         cursor.execute(sql_query, values)
-        if 'attachment' in request.files:
-            file = request.files['attachment']
-            if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                if not os.path.exists(app.config['UPLOAD_FOLDER']):
-                    os.makedirs(app.config['UPLOAD_FOLDER'])
-                attachment_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(attachment_path)
-                cursor.execute("UPDATE tickets SET attachment_path = %s WHERE id = %s", (attachment_path, ticket_id))
+        attachment = save_attachment()
+        if attachment:
+            attachment_name, stored = attachment
+            cursor.execute(
+                "UPDATE tickets SET attachment_path = %s, attachment_name = %s, attachment_size = %s, "
+                "attachment_sha256 = %s WHERE id = %s",
+                (stored.path, attachment_name, stored.size, stored.sha256, ticket_id)
+            )
 
         conn.commit()
+        invalidate_ticket_summary()
+        versions = table_versions.bump('tickets')
+        ticket_search_index.update(ticket_id, form_data.get('subject'), form_data.get('description'),
+                                   form_data.get('status'), form_data.get('customer'), versions)
         flash('Ticket updated successfully!', 'success')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -609,23 +2554,124 @@ def update_ticket(ticket_id):
 
 
 
+@tickets_bp.route('/attachment/<int:ticket_id>')
+@login_required
+@roles_required('Admin', 'Consultant', 'Customer')
+def download_attachment(ticket_id):
+    """
+    Sends a ticket's attachment with ETag/Last-Modified validation and byte-range
+    support, or delegates the transfer to the front proxy when ATTACHMENT_SENDFILE_MODE is set.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return "Database connection failed! Please check server logs.", 500
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT attachment_path, attachment_name, attachment_sha256 FROM tickets WHERE id = %s",
+            (ticket_id,)
+        )
+        ticket = cursor.fetchone()
+    except mysql.connector.Error as err:
+        app.logger.error(f"Database Error fetching attachment for ticket {ticket_id}: {err}")
+        return "Failed to fetch attachment.", 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    if not ticket or not ticket['attachment_path']:
+        abort(404)
+
+    upload_root = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    path = os.path.abspath(ticket['attachment_path'])
+    if not path.startswith(upload_root + os.sep) or not os.path.isfile(path):
+        abort(404)
+
+    download_name = ticket['attachment_name'] or os.path.basename(path)
+    etag = ticket['attachment_sha256'] or True  # content hash when known, else Werkzeug's mtime/size tag
+    mode = app.config['ATTACHMENT_SENDFILE_MODE']
+
+    if mode == 'x-accel-redirect':
+        response = app.response_class()
+        response.headers['X-Accel-Redirect'] = (
+            app.config['ATTACHMENT_ACCEL_PREFIX'] + os.path.relpath(path, upload_root).replace(os.sep, '/')
+        )
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.content_type = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+        if ticket['attachment_sha256']:
+            response.set_etag(ticket['attachment_sha256'])
+    else:
+        response = send_file(
+            path, request.environ,
+            mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream',
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=etag,
+            max_age=app.config['ATTACHMENT_MAX_AGE'],
+            use_x_sendfile=(mode == 'x-sendfile'),
+            response_class=app.response_class,
+        )
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+
+def resolve_assignees(cursor, names=None, ids=None):
+    """Looks up assignable users (Admins and Consultants) by name or by id; returns dicts with id and name."""
+    column, values = ('name', names) if names is not None else ('id', ids)
+    placeholders = ', '.join(['%s'] * len(values))
+    cursor.execute(
+        f"SELECT id, name FROM users WHERE {column} IN ({placeholders}) "
+        "AND user_type IN ('Admin', 'Consultant') ORDER BY name",
+        tuple(values)
+    )
+    return cursor.fetchall()
+
+def assign_tickets_to_users(cursor, ticket_ids, assignees):
+    """
+    Replaces the assignees of the given tickets with `assignees` (dicts with id and
+    name) and marks the tickets Assigned, using executemany for the link rows. The
+    ticket_assignees table is the source of truth; assigned_to_user_name is kept as
+    a display cache. Locks the tickets, skips ids that do not exist, and returns the
+    ids actually assigned. The caller commits.
+    """
+    placeholders = ', '.join(['%s'] * len(ticket_ids))
+    cursor.execute(f"SELECT id FROM tickets WHERE id IN ({placeholders}) FOR UPDATE", tuple(ticket_ids))
+    found_ids = [row['id'] for row in cursor.fetchall()]
+    if not found_ids:
+        return []
+
+    placeholders = ', '.join(['%s'] * len(found_ids))
+    cursor.execute(f"DELETE FROM ticket_assignees WHERE ticket_id IN ({placeholders})", tuple(found_ids))
+    cursor.executemany(
+        "INSERT INTO ticket_assignees (ticket_id, user_id) VALUES (%s, %s)",
+        [(ticket_id, assignee['id']) for ticket_id in found_ids for assignee in assignees]
+    )
+    cursor.execute(
+        f"UPDATE tickets SET assigned_to_user_name = %s, status = 'Assigned' WHERE id IN ({placeholders})",
+        (', '.join(a['name'] for a in assignees), *found_ids)
+    )
+    return found_ids
+
+ASSIGNED_TICKET_COLUMNS = "id, ticket_number, subject, customer, status, assigned_to_user_name"
+
 @tickets_bp.route('/perform_assignment', methods=['POST'])
 def perform_assignment():
     """
-    Handles the AJAX request to assign a ticket to a user.
-    Expects JSON data: {'ticket_id': <int>, 'assignee_name': <str>}
+    Handles the AJAX request to assign a ticket to one or more users.
+    Expects JSON data: {'ticket_id': <int>, 'assignee_names': [<str>, ...]}
     Returns the updated ticket data on success.
     """
     if request.is_json:
         data = request.get_json()
         ticket_id = data.get('ticket_id')
         assignee_names = data.get('assignee_names')
-        if isinstance(assignee_names, list):
-            assignee_names_str = ', '.join(assignee_names)
-        else:
-            assignee_names_str = str(assignee_names) if assignee_names else ''
+        if not isinstance(assignee_names, list):
+            assignee_names = [str(assignee_names)] if assignee_names else []
 
-        if not ticket_id or not assignee_names_str:
+        if not ticket_id or not assignee_names:
             return jsonify({'success': False, 'message': 'Missing ticket ID or assignee name.'}), 400
 
         conn = get_db_connection()
@@ -634,17 +2680,25 @@ def perform_assignment():
 
         cursor = conn.cursor(dictionary=True)
         try:
-            cursor.execute(
-                "UPDATE tickets SET assigned_to_user_name = %s, status = 'Assigned' WHERE id = %s",
-                (assignee_names_str, ticket_id)
-            )
-            conn.commit()
-
-            if cursor.rowcount == 0:
+            by_name = {a['name']: a for a in resolve_assignees(cursor, names=assignee_names)}
+            unknown = [name for name in assignee_names if name not in by_name]
+            if unknown:
+                return jsonify({'success': False, 'message': f"Unknown assignee(s): {', '.join(unknown)}."}), 400
+            # Keep the order the names were picked in for the display string
+            assignees = [by_name[name] for name in dict.fromkeys(assignee_names)]
+            assignee_names_str = ', '.join(a['name'] for a in assignees)
+
+            assigned_ids = assign_tickets_to_users(cursor, [ticket_id], assignees)
+            if not assigned_ids:
+                conn.rollback()
                 return jsonify({'success': False, 'message': 'Ticket not found or no changes made.'}), 404
+            conn.commit()
+            invalidate_ticket_summary()
+            versions = table_versions.bump('tickets')
+            ticket_search_index.update_status(assigned_ids, 'Assigned', versions)
 
             # Fetch the updated ticket data to send back to the frontend
-            cursor.execute("SELECT id, ticket_number, subject, customer, status, assigned_to_user_name FROM tickets WHERE id = %s", (ticket_id,))
+            cursor.execute(f"SELECT {ASSIGNED_TICKET_COLUMNS} FROM tickets WHERE id = %s", (ticket_id,))
             updated_ticket = cursor.fetchone()
 
             # Defensive: If fetch fails, still return success
@@ -670,106 +2724,141 @@ def perform_assignment():
         return jsonify({'success': False, 'message': 'Request must be JSON.'}), 400
 
 
+@tickets_bp.route('/bulk_assign', methods=['POST'])
+@login_required
+@roles_required('Admin', 'Consultant', 'Customer')
+def bulk_assign():
+    """
+    Assigns many tickets to the same set of users in one transaction.
+    Expects JSON data: {'ticket_ids': [<int>, ...], 'assignee_ids': [<int>, ...]}
+    Returns the updated tickets and any ticket ids that were not found.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'message': 'Request must be JSON.'}), 400
+    try:
+        ticket_ids = list(dict.fromkeys(int(t) for t in data.get('ticket_ids') or []))
+        assignee_ids = list(dict.fromkeys(int(a) for a in data.get('assignee_ids') or []))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'ticket_ids and assignee_ids must be lists of ids.'}), 400
+    if not ticket_ids or not assignee_ids:
+        return jsonify({'success': False, 'message': 'Missing ticket IDs or assignee IDs.'}), 400
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'success': False, 'message': 'Database connection failed.'}), 500
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        assignees = resolve_assignees(cursor, ids=assignee_ids)
+        if len(assignees) != len(assignee_ids):
+            unknown = sorted(set(assignee_ids) - {a['id'] for a in assignees})
+            return jsonify({'success': False, 'message': f"Unknown assignee id(s): {unknown}."}), 400
+
+        assigned_ids = assign_tickets_to_users(cursor, ticket_ids, assignees)
+        conn.commit()
+        invalidate_ticket_summary()
+        versions = table_versions.bump('tickets')
+        ticket_search_index.update_status(assigned_ids, 'Assigned', versions)
+
+        tickets = []
+        if assigned_ids:
+            placeholders = ', '.join(['%s'] * len(assigned_ids))
+            cursor.execute(f"SELECT {ASSIGNED_TICKET_COLUMNS} FROM tickets WHERE id IN ({placeholders}) ORDER BY ticket_number",
+                           tuple(assigned_ids))
+            tickets = cursor.fetchall()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        app.logger.error(f"Error bulk assigning tickets {ticket_ids}: {err}")
+        return jsonify({'success': False, 'message': 'An internal error occurred.'}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    missing = sorted(set(ticket_ids) - set(assigned_ids))
+    return jsonify({
+        'success': True,
+        'message': f"{len(assigned_ids)} ticket(s) assigned to {', '.join(a['name'] for a in assignees)}.",
+        'tickets': tickets,
+        'missing_ticket_ids': missing,
+    }), 200
+
+
+@tickets_bp.route('/api/my_tickets')
+@login_required
+def my_tickets():
+    """
+    Returns the tickets assigned to the current user, newest first, through the
+    ticket_assignees (user_id, ticket_id) index. Accepts status, limit and cursor.
+    """
+    limit = min(max(request.args.get('limit', TICKET_PAGE_SIZE, type=int), 1), TICKET_PAGE_SIZE_MAX)
+    sql_query = (
+        "SELECT t.id, t.ticket_number, t.subject AS task, t.customer, t.priority, t.status "
+        "FROM ticket_assignees ta JOIN tickets t ON t.id = ta.ticket_id WHERE ta.user_id = %s"
+    )
+    params = [current_user.id]
+    if request.args.get('status'):
+        sql_query += " AND t.status = %s"
+        params.append(request.args['status'])
+    if request.args.get('cursor'):
+        try:
+            _, last_id = decode_page_cursor(request.args['cursor'])
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor.'}), 400
+        sql_query += " AND ta.ticket_id < %s"
+        params.append(last_id)
+    sql_query += " ORDER BY ta.ticket_id DESC LIMIT %s"
+    params.append(limit + 1)
+
+    conn = get_db_connection()
+    if conn is None:
+        return jsonify({'error': 'Database connection failed'}), 500
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql_query, tuple(params))
+        tickets = cursor.fetchall()
+    except mysql.connector.Error as err:
+        app.logger.error(f"Failed to fetch tickets for user {current_user.id}. Error: {err}")
+        return jsonify({'error': 'An internal error occurred.'}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    has_more = len(tickets) > limit
+    tickets = tickets[:limit]
+    next_cursor = encode_page_cursor([None, tickets[-1]['id']]) if has_more else None
+    return jsonify({'tickets': tickets, 'next_cursor': next_cursor, 'has_more': has_more})
+
+
 holidays_bp = Blueprint('holidays', __name__, template_folder='html')
 
+holiday_calendar = HolidayCalendar(app.config['HOLIDAY_CALENDAR_TTL'])
+
 # Holidays (Admin/Consultant only)
 @holidays_bp.route('/list')
 @login_required
 @roles_required('Admin', 'Consultant')
+@conditional_page('holidays')
 def holiday_list():
-    """Renders the holiday management page, fetching data from MySQL."""
-    conn = get_db_connection()
+    """Renders the holiday management page from the in-memory holiday calendar."""
     holidays = []
     
     filter_type = request.args.get('filter_type', 'all')
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
-    start_date_filter = None
-    end_date_filter = None
-
-    current_date = date.today()
-
-    if filter_type == 'this_month':
-        start_date_filter = current_date.replace(day=1)
-        if current_date.month == 12:
-            end_date_filter = current_date.replace(year=current_date.year + 1, month=1, day=1) - timedelta(days=1)
-        else:
-            end_date_filter = current_date.replace(month=current_date.month + 1, day=1) - timedelta(days=1)
-    elif filter_type == 'this_week':
-        start_date_filter = current_date - timedelta(days=current_date.weekday())
-        end_date_filter = start_date_filter + timedelta(days=6)
-    elif filter_type == 'today':
-        start_date_filter = current_date
-        end_date_filter = current_date
-    elif filter_type == 'custom_range':
-        try:
-            if start_date_str:
-                start_date_filter = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            if end_date_str:
-                end_date_filter = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            flash("Invalid date format for custom range. Please use YYYY-MM-DD.", 'error')
-            start_date_filter = None
-            end_date_filter = None
-
+    start_date_filter, end_date_filter = resolve_date_filter(filter_type, start_date_str, end_date_str)
 
-    if not conn:
-        flash('Database connection failed.', 'error')
-        return render_template('holiday.html', holidays=holidays, filter_type=filter_type, 
-                               start_date=start_date_str, end_date=end_date_str)
-    
-    cursor = conn.cursor(dictionary=True)
     try:
-        sql_query = "SELECT id, country, name, holiday_date FROM holidays"
-        params = []
-        where_clauses = []
-
-        if start_date_filter and end_date_filter:
-            where_clauses.append("holiday_date BETWEEN %s AND %s")
-            params.append(start_date_filter)
-            params.append(end_date_filter)
-        elif start_date_filter:
-            where_clauses.append("holiday_date >= %s")
-            params.append(start_date_filter)
-        elif end_date_filter:
-            where_clauses.append("holiday_date <= %s")
-            params.append(end_date_filter)
-        
-        if where_clauses:
-            sql_query += " WHERE " + " AND ".join(where_clauses)
-            
-        sql_query += " ORDER BY holiday_date ASC"
-
-        cursor.execute(sql_query, tuple(params))
-        holidays = cursor.fetchall()
-
-        for holiday in holidays:
-            if isinstance(holiday['holiday_date'], datetime):
-                holiday['display_date'] = holiday['holiday_date'].strftime('%d/%m/%Y')
-                holiday['form_date'] = holiday['holiday_date'].strftime('%Y-%m-%d')
-            elif isinstance(holiday['holiday_date'], date):
-                holiday['display_date'] = holiday['holiday_date'].strftime('%d/%m/%Y')
-                holiday['form_date'] = holiday['holiday_date'].strftime('%Y-%m-%d')
-            elif isinstance(holiday['holiday_date'], str):
-                try:
-                    dt = datetime.strptime(holiday['holiday_date'], '%Y-%m-%d').date()
-                    holiday['display_date'] = dt.strftime('%d/%m/%Y')
-                    holiday['form_date'] = dt.strftime('%Y-%m-%d')
-                except Exception:
-                    holiday['display_date'] = holiday['holiday_date']
-                    holiday['form_date'] = holiday['holiday_date']
-            else:
-                holiday['display_date'] = ''
-                holiday['form_date'] = ''
-
+        holidays = holiday_calendar.between(start_date_filter, end_date_filter)
     except mysql.connector.Error as err:
         app.logger.error(f"Error fetching holidays: {err}")
         flash('Could not fetch holiday data from the database.', 'error')
-    finally:
-        cursor.close()
-        conn.close()
-        
+
+    if app.config['STREAM_LISTINGS']:
+        get_flashed_messages()  # pop them now: the session cookie is sent before a streamed body renders
+        return stream_template('holiday.html', holidays=holidays, filter_type=filter_type, 
+                               start_date=start_date_str, end_date=end_date_str)
     return render_template('holiday.html', holidays=holidays, filter_type=filter_type, 
                            start_date=start_date_str, end_date=end_date_str)
 
@@ -796,6 +2885,8 @@ def add_holiday():
             (country, name, date)
         )
         conn.commit()
+        holiday_calendar.invalidate()
+        table_versions.bump('holidays')
         flash('Holiday added successfully!', 'success')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -807,6 +2898,30 @@ def add_holiday():
         
     return redirect(url_for('holidays.holiday_list'))
 
+def validate_holiday_import_row(row):
+    return (
+        import_value(row, 'country', required=True),
+        import_value(row, 'holiday_name') or import_value(row, 'name', required=True),
+        import_date(row, 'holiday_date', required=True),
+    )
+
+@holidays_bp.route('/import', methods=['POST'])
+@login_required
+@roles_required('Admin', 'Consultant')
+def import_holidays():
+    """
+    Bulk-adds holidays from an uploaded CSV/XLSX file with country, holiday_name
+    (or name) and holiday_date columns. Returns a JSON report with per-row errors.
+    """
+    def imported():
+        holiday_calendar.invalidate()
+        table_versions.bump('holidays')
+    return handle_import_upload(
+        validate_holiday_import_row,
+        "INSERT INTO holidays (country, name, holiday_date) VALUES (%s, %s, %s)",
+        on_commit=imported
+    )
+
 @holidays_bp.route('/update/<int:holiday_id>', methods=['POST'])
 def update_holiday(holiday_id):
     """Handles updating an existing holiday in the MySQL database."""
@@ -830,6 +2945,8 @@ def update_holiday(holiday_id):
             (country, name, date, holiday_id)
         )
         conn.commit()
+        holiday_calendar.invalidate()
+        table_versions.bump('holidays')
         flash('Holiday updated successfully!', 'success')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -853,6 +2970,8 @@ def delete_holiday(holiday_id):
     try:
         cursor.execute("DELETE FROM holidays WHERE id = %s", (holiday_id,))
         conn.commit()
+        holiday_calendar.invalidate()
+        table_versions.bump('holidays')
         flash('Holiday deleted successfully!', 'danger')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -872,6 +2991,7 @@ leave_bp = Blueprint('leaves', __name__, template_folder='html')
 @leave_bp.route('/list')
 @login_required
 @roles_required('Admin', 'Consultant')
+@conditional_page('leave_requests')
 def leave_list():
     """Renders the leave request page, fetching data from MySQL, with date filtering."""
     conn = get_db_connection()
@@ -881,92 +3001,56 @@ def leave_list():
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
-    start_date_filter = None
-    end_date_filter = None
-
-    current_date = date.today()
-
-    if filter_type == 'this_month':
-        start_date_filter = current_date.replace(day=1)
-        if current_date.month == 12:
-            end_date_filter = current_date.replace(year=current_date.year + 1, month=1, day=1) - timedelta(days=1)
-        else:
-            end_date_filter = current_date.replace(month=current_date.month + 1, day=1) - timedelta(days=1)
-    elif filter_type == 'this_week':
-        start_date_filter = current_date - timedelta(days=current_date.weekday())
-        end_date_filter = start_date_filter + timedelta(days=6)
-    elif filter_type == 'today':
-        start_date_filter = current_date
-        end_date_filter = current_date
-    elif filter_type == 'custom_range':
-        try:
-            if start_date_str:
-                start_date_filter = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            if end_date_str:
-                end_date_filter = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            flash("Invalid date format for custom range. Please use YYYY-MM-DD.", 'error')
-            start_date_filter = None
-            end_date_filter = None
+    start_date_filter, end_date_filter = resolve_date_filter(filter_type, start_date_str, end_date_str)
 
     if not conn:
         flash('Database connection failed.', 'error')
         return render_template('leave_request.html', leaves=leaves, filter_type=filter_type, 
                                start_date=start_date_str, end_date=end_date_str, user=current_user)
     
+    sql_query = "SELECT id, consultant_name, leave_date, leave_type, remarks FROM leave_requests"
+    where_clause, params = date_range_clause('leave_date', start_date_filter, end_date_filter)
+    if where_clause:
+        sql_query += " WHERE " + where_clause
+    sql_query += " ORDER BY leave_date DESC, created_at DESC"
+
     cursor = conn.cursor(dictionary=True)
     try:
-        sql_query = "SELECT id, consultant_name, leave_date, leave_type, remarks FROM leave_requests"
-        params = []
-        where_clauses = []
-
-        if start_date_filter and end_date_filter:
-            where_clauses.append("leave_date BETWEEN %s AND %s")
-            params.append(start_date_filter)
-            params.append(end_date_filter)
-        elif start_date_filter:
-            where_clauses.append("leave_date >= %s")
-            params.append(start_date_filter)
-        elif end_date_filter:
-            where_clauses.append("leave_date <= %s")
-            params.append(end_date_filter)
-        
-        if where_clauses:
-            sql_query += " WHERE " + " AND ".join(where_clauses)
-            
-        sql_query += " ORDER BY leave_date DESC, created_at DESC"
-
         cursor.execute(sql_query, tuple(params))
-        leaves = cursor.fetchall()
-        
-        for leave in leaves:
-            if isinstance(leave['leave_date'], datetime):
-                leave['display_date'] = leave['leave_date'].strftime('%d/%m/%Y')
-                leave['form_date'] = leave['leave_date'].strftime('%Y-%m-%d')
-            elif isinstance(leave['leave_date'], date):
-                leave['display_date'] = leave['leave_date'].strftime('%d/%m/%Y')
-                leave['form_date'] = leave['leave_date'].strftime('%Y-%m-%d')
-            elif isinstance(leave['leave_date'], str):
-                try:
-                    dt = datetime.strptime(leave['leave_date'], '%Y-%m-%d').date()
-                    leave['display_date'] = dt.strftime('%d/%m/%Y')
-                    leave['form_date'] = dt.strftime('%Y-%m-%d')
-                except Exception:
-                    leave['display_date'] = leave['leave_date']
-                    leave['form_date'] = leave['leave_date']
-            else:
-                leave['display_date'] = ''
-                leave['form_date'] = ''
     except mysql.connector.Error as err:
+        cursor.close()
         app.logger.error(f"Error fetching leave requests: {err}")
         flash('Could not fetch leave request data from the database.', 'error')
-    finally:
-        cursor.close()
-        conn.close()
-        
+        return render_template('leave_request.html', leaves=leaves, filter_type=filter_type, 
+                               start_date=start_date_str, end_date=end_date_str, user=current_user)
+
+    if app.config['STREAM_LISTINGS']:
+        # Rows are read from the unbuffered cursor while the page is being sent
+        get_flashed_messages()  # pop them now: the session cookie is sent before a streamed body renders
+        return stream_template('leave_request.html', leaves=iter_rows(cursor), filter_type=filter_type, 
+                               start_date=start_date_str, end_date=end_date_str, user=current_user)
+
+    try:
+        leaves = list(iter_rows(cursor))
+    except mysql.connector.Error:
+        flash('Could not fetch leave request data from the database.', 'error')
     return render_template('leave_request.html', leaves=leaves, filter_type=filter_type, 
                            start_date=start_date_str, end_date=end_date_str, user=current_user)
 
+@leave_bp.route('/export.csv')
+@login_required
+@roles_required('Admin', 'Consultant')
+def export_leaves():
+    """Streams leave requests as CSV, honouring the same date filters as leave_list."""
+    start_date, end_date = resolve_date_filter(request.args.get('filter_type', 'all'),
+                                               request.args.get('start_date'), request.args.get('end_date'))
+    sql_query = "SELECT consultant_name, leave_date, leave_type, remarks, created_at FROM leave_requests"
+    where_clause, params = date_range_clause('leave_date', start_date, end_date)
+    if where_clause:
+        sql_query += " WHERE " + where_clause
+    sql_query += " ORDER BY leave_date DESC, created_at DESC"
+    return export_query(sql_query, params, f"leave-requests-{date.today()}.csv")
+
 @leave_bp.route('/add', methods=['POST'])
 def add_leave():
     """Handles adding a new leave request to the MySQL database."""
@@ -987,10 +3071,12 @@ def add_leave():
     cursor = conn.cursor()
     try:
         cursor.execute(
-            "INSERT INTO leave_requests (consultant_name, leave_date, leave_type, remarks) VALUES (%s, %s, %s, %s)",
-            (consultant_name, leave_date, leave_type, remarks)
+            "INSERT INTO leave_requests (consultant_name, leave_date, leave_type, remarks, user_id) "
+            f"VALUES (%s, %s, %s, %s, {LEAVE_USER_ID_SQL})",
+            (consultant_name, leave_date, leave_type, remarks, consultant_name)
         )
         conn.commit()
+        table_versions.bump('leave_requests')
         flash('Leave request added successfully!', 'success')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -1002,6 +3088,54 @@ def add_leave():
         
     return redirect(url_for('leaves.leave_list'))
 
+# Resolves a consultant name to a user id; NULL when no user or several users have that name
+LEAVE_USER_ID_SQL = "(SELECT MIN(id) FROM users WHERE name = %s HAVING COUNT(*) = 1)"
+
+def link_leave_users():
+    """Fills in user_id for leave requests written without one (bulk imports insert names only)."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "UPDATE leave_requests l "
+            "JOIN (SELECT name, MIN(id) AS id FROM users GROUP BY name HAVING COUNT(*) = 1) u "
+            "ON u.name = l.consultant_name SET l.user_id = u.id WHERE l.user_id IS NULL"
+        )
+        conn.commit()
+    except mysql.connector.Error as err:
+        conn.rollback()
+        app.logger.error(f"Failed to link imported leave requests to users. Error: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
+def validate_leave_import_row(row):
+    return (
+        import_value(row, 'consultant_name', required=True),
+        import_date(row, 'leave_date', required=True),
+        import_value(row, 'leave_type', required=True),
+        import_value(row, 'remarks'),
+    )
+
+@leave_bp.route('/import', methods=['POST'])
+@login_required
+@roles_required('Admin', 'Consultant')
+def import_leaves():
+    """
+    Bulk-adds leave requests from an uploaded CSV/XLSX file with consultant_name,
+    leave_date, leave_type and remarks columns. Returns a JSON report with per-row errors.
+    """
+    def imported():
+        link_leave_users()
+        table_versions.bump('leave_requests')
+    return handle_import_upload(
+        validate_leave_import_row,
+        "INSERT INTO leave_requests (consultant_name, leave_date, leave_type, remarks) VALUES (%s, %s, %s, %s)",
+        on_commit=imported
+    )
+
 @leave_bp.route('/update/<int:leave_id>', methods=['POST'])
 def update_leave(leave_id):
     """Handles updating an existing leave request in the MySQL database."""
@@ -1022,10 +3156,14 @@ def update_leave(leave_id):
     cursor = conn.cursor()
     try:
         cursor.execute(
-            "UPDATE leave_requests SET consultant_name = %s, leave_date = %s, leave_type = %s, remarks = %s WHERE id = %s",
-            (consultant_name, leave_date, leave_type, remarks, leave_id)
+            # user_id is assigned first, so it still compares against the old name
+            "UPDATE leave_requests SET "
+            f"user_id = IF(consultant_name = %s, user_id, {LEAVE_USER_ID_SQL}), "
+            "consultant_name = %s, leave_date = %s, leave_type = %s, remarks = %s WHERE id = %s",
+            (consultant_name, consultant_name, consultant_name, leave_date, leave_type, remarks, leave_id)
         )
         conn.commit()
+        table_versions.bump('leave_requests')
         flash('Leave request updated successfully!', 'success')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -1049,6 +3187,7 @@ def delete_leave(leave_id):
     try:
         cursor.execute("DELETE FROM leave_requests WHERE id = %s", (leave_id,))
         conn.commit()
+        table_versions.bump('leave_requests')
         flash('Leave request deleted successfully!', 'danger')
     except mysql.connector.Error as err:
         conn.rollback()
@@ -1087,19 +3226,43 @@ class User(UserMixin):
     def get_id(self):
         return str(self.id)
 
+# user id -> (User, users table version when loaded); a principal is only reused while the
+# version is unchanged, so a worker never keeps serving a user another worker deleted or demoted
+user_cache = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+
+def invalidate_user(user_id):
+    """Drops a cached principal so the next request re-reads it from the database."""
+    user_cache.pop(str(user_id))
+
 @login_manager.user_loader
 def load_user(user_id):
+    user_id = str(user_id)
+    table_version = table_versions.get('users')
+    cached = user_cache.get(user_id)
+    if cached is not None and cached[1] == table_version:
+        return cached[0]
+
     conn = get_db_connection()
+    if conn is None:
+        return None
     cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+    cursor.execute("SELECT id, user_name, password, user_type, name FROM users WHERE id = %s", (user_id,))
     user = cursor.fetchone()
     cursor.close()
     conn.close()
     if user:
-        # Add user['name'] here
-        return User(user['id'], user['user_name'], user['password'], user['user_type'], user['name'])
+        user_obj = User(user['id'], user['user_name'], user['password'], user['user_type'], user['name'])
+        user_cache.set(user_id, (user_obj, table_version))
+        return user_obj
     return None
 
+@app.route('/admin/db_pool')
+@login_required
+@roles_required('Admin')
+def db_pool_stats():
+    """Reports connection pool usage as JSON."""
+    return jsonify(get_db_pool().stats())
+
 # --- Login and Logout Routes ---
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -1155,6 +3318,8 @@ def change_password():
         hashed_password = generate_password_hash(new_password)
         cursor.execute("UPDATE users SET password = %s WHERE id = %s", (hashed_password, current_user.id))
         conn.commit()
+        invalidate_user(current_user.id)
+        table_versions.bump('users')
         cursor.close()
         conn.close()
         flash('Password changed successfully!', 'success')
@@ -1162,9 +3327,201 @@ def change_password():
 
     return render_template('change_password.html', user=current_user)
 
+# --- Application Factory ---
+CONFIG_ENV_PREFIX = 'TICKETING'
+
+# Always strings, even when the environment value looks like JSON (TICKETING_DB_PASSWORD=123456)
+STRING_CONFIG_KEYS = ('SECRET_KEY', 'DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_NAME')
+
+def load_config(config=None):
+    """
+    Loads the settings and returns app.config, without starting anything: what the
+    command-line tools (migrate.py, bench.seed) need. Settings are layered over the
+    defaults above in this order: the Python file named by TICKETING_CONFIG,
+    TICKETING_* environment variables (e.g. TICKETING_DB_HOST, TICKETING_DB_POOL_SIZE=20;
+    values are parsed as JSON when possible), then `config`, a mapping or a config file path.
+    """
+    config_file = os.environ.get(f'{CONFIG_ENV_PREFIX}_CONFIG')
+    if config_file:
+        app.config.from_pyfile(os.path.abspath(config_file))
+    app.config.from_prefixed_env(CONFIG_ENV_PREFIX)
+    if isinstance(config, (str, os.PathLike)):
+        app.config.from_pyfile(os.path.abspath(config))
+    elif config:
+        app.config.update(config)
+    for key in STRING_CONFIG_KEYS:
+        if app.config[key] is not None:
+            app.config[key] = str(app.config[key])
+    return app.config
+
+def create_app(config=None):
+    """
+    Configures the application for serving (see load_config() for where settings come
+    from) and returns it: refuses development secrets outside debug mode, sizes the
+    caches, checks the schema and warms up the templates.
+    """
+    load_config(config)
+    if not app.debug:
+        insecure = [key for key, default in INSECURE_DEFAULTS.items() if app.config[key] == default]
+        if insecure:
+            raise RuntimeError(
+                f"{', '.join(insecure)} still set to the built-in development value; set "
+                f"{', '.join(f'{CONFIG_ENV_PREFIX}_{key}' for key in insecure)} in the environment "
+                f"(or {CONFIG_ENV_PREFIX}_DEBUG=true for local development)")
+
+    # The module-level caches were sized from the defaults at import time
+    user_cache.maxsize = app.config['USER_CACHE_SIZE']
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+    reference_data.ttl = app.config['REFERENCE_DATA_TTL']
+    ticket_summary_cache.ttl = app.config['TICKET_SUMMARY_TTL']
+    holiday_calendar.ttl = app.config['HOLIDAY_CALENDAR_TTL']
+    ticket_search_index.ttl = app.config['TICKET_SEARCH_INDEX_TTL']
+    request_metrics.directory = app.config['METRICS_DIR']
+    request_metrics.flush_interval = app.config['METRICS_FLUSH_INTERVAL']
+    table_versions.directory = app.config['CHANGE_VERSIONS_DIR']
+    asset_manifest.load(app.static_folder)
+    reset_db_pool()
+    if app.config['SCHEMA_CHECK']:
+        check_schema()
+
+    # Make sure the 'uploads' directory and its temp/object areas exist
+    for folder in ('tmp', 'objects'):
+        os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], folder), exist_ok=True)
+
+    auto_reload = app.config['TEMPLATES_AUTO_RELOAD']
+    app.jinja_env.auto_reload = app.debug if auto_reload is None else auto_reload
+    if app.config['TEMPLATE_CACHE_DIR'] and ensure_private_dir(app.config['TEMPLATE_CACHE_DIR']):
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])
+    if app.config['TEMPLATE_WARMUP']:
+        # Runs before the server takes traffic: in the gunicorn master with preload_app,
+        # so every worker (recycled ones too) forks with the templates already compiled
+        precompile_templates()
+        warm_up_templates()
+    return app
+
+def ensure_private_dir(path):
+    """
+    Creates `path` readable by this user only, or checks that an existing one is a
+    real directory owned by this user with no group/other access. Compiled templates
+    are loaded as code, so a directory anyone else can write to is refused (and
+    logged); the app then runs without the cache.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    owner_ok = not hasattr(os, 'getuid') or info.st_uid == os.getuid()
+    if not stat.S_ISDIR(info.st_mode) or not owner_ok or info.st_mode & 0o077:
+        app.logger.warning(f"Not using {path} for compiled templates: it must be a directory owned by "
+                           f"this user with no group or other access")
+        return False
+    return True
+
+def precompile_templates():
+    """
+    Compiles every template into the Jinja template cache, reading and writing
+    compiled bytecode in TEMPLATE_CACHE_DIR when set, so no request pays for it.
+    """
+    started = time.perf_counter()
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    app.logger.info(f"Compiled {len(names)} templates in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def template_warmup_contexts():
+    """Fixture data for warm_up_templates(): one context per page, shaped like what its view passes."""
+    today = date.today()
+    now = datetime.now()
+    user = {
+        'id': 0, 'name': 'Warm-up User', 'user_name': 'warmup', 'user_type': 'Admin', 'consultant_type': '',
+        'reporting_manager': '', 'mobile': '', 'alternate_mobile': '', 'office_email': 'warmup@example.com',
+        'position': 'Manager', 'status': 'Active', 'joining_date': today, 'date_of_birth': today,
+        'anniversary_date': today, 'worksnap_credentials': '', 'sap_server_credentials': '',
+        'timesheet_notification': 'No', 'allow_backdated_timesheet': 'No', 'password': '',
+    }
+    ticket = {
+        'id': 0, 'ticket_number': 'TKT-0', 'customer': '1', 'subject': 'Warm-up', 'description': '',
+        'module': 'Support', 'status': 'Open', 'form_type': 'Incident', 'task_given_by': '',
+        'approved_hours': 0, 'assigned_to_user_name': 'Warm-up User', 'attachment_name': None,
+        'attachment_path': None,
+    }
+    listing_filters = {'filter_type': 'this_month', 'start_date': None, 'end_date': None}
+    return {
+        'login.html': {},
+        'dashboard.html': {'can_export': True, 'summary': {'total': 1, 'status': {'Open': 1}, 'priority': {'Medium': 1}, 'customer': [],
+                                       'week': [{'week_start': today.isoformat(), 'count': 1}]}},
+        'user_data.html': {'users': [user]},
+        'user_form.html': {'user': user, 'managers': [{'id': 0, 'name': 'Warm-up Manager'}]},
+        'attendance.html': {'user': user, 'now': now, 'attendance': {'date': today, 'check_in': now, 'check_out': None},
+                            'records': [{'date': today, 'check_in': now, 'check_out': now}]},
+        'assign_tickets.html': {'open_tickets': [ticket], 'assigned_tickets': [ticket],
+                                'assignees': [{'id': 0, 'name': 'Warm-up User', 'user_type': 'Consultant'}]},
+        'new_task.html': {'ticket': ticket, 'customers': [{'id': 1, 'name': 'Warm-up Customer'}], 'edit_mode': True},
+        'holiday.html': {'holidays': [{'id': 0, 'country': 'India', 'name': 'Warm-up', 'holiday_date': today,
+                                       'display_date': today.strftime('%d/%m/%Y'), 'form_date': today.isoformat()}],
+                         **listing_filters},
+        'leave_request.html': {'leaves': [{'id': 0, 'consultant_name': 'Warm-up User', 'leave_date': today,
+                                           'leave_type': 'Sick', 'remarks': ''}], 'user': user, **listing_filters},
+        'change_password.html': {'user': user},
+    }
+
+def warm_up_templates():
+    """
+    Renders each page once against fixture data, outside any real request, so the
+    first visitor after a deploy or worker recycle does not pay for the code paths
+    compiling alone does not reach (url_for's URL map, filters, context processors).
+    A page that fails to render is logged and skipped; warm-up never stops startup.
+    """
+    started = time.perf_counter()
+    with app.test_request_context('/'):
+        for name, context in template_warmup_contexts().items():
+            try:
+                render_template(name, **context)
+            except Exception as err:
+                app.logger.warning(f"Template warm-up failed for {name}: {err}")
+    app.logger.info(f"Warmed up templates in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def check_schema():
+    """
+    Logs the database schema version, applying pending migrations first when
+    MIGRATE_ON_STARTUP is set. Never stops the app from starting.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        app.logger.warning("Could not check the schema version: database unavailable")
+        return
+    try:
+        if app.config['MIGRATE_ON_STARTUP']:
+            migrate.migrate(conn, log=app.logger.info)
+        current, latest, pending, changed = migrate.schema_status(conn)
+    except (mysql.connector.Error, RuntimeError) as err:
+        app.logger.error(f"Could not check the schema version. Error: {err}")
+        return
+    finally:
+        conn.close()
+
+    if pending:
+        app.logger.warning(f"Database schema is at version {current}, {len(pending)} migration(s) behind "
+                           f"version {latest}. Run: python migrate.py up")
+    else:
+        app.logger.info(f"Database schema is at version {current}")
+    if changed:
+        app.logger.warning(f"Migrations changed after they were applied: {changed}")
+
+def reset_after_fork():
+    """
+    Drops per-process resources inherited from a preloading parent: pooled database
+    connections (their sockets detached, see reset_db_pool), the slow-query log opened
+    under the parent's pid, the password-hashing threads, which do not survive fork(), any
+    request metrics the parent recorded and in-memory table versions. Called from the
+    post_fork hook in gunicorn.conf.py.
+    """
+    global _hash_pool
+    reset_db_pool()
+    reset_slow_query_logger()
+    _hash_pool = None
+    request_metrics.reset()
+    table_versions.reset()
+
 # --- Main Execution ---
 if __name__ == '__main__':
-    # Make sure the 'uploads' directory exists
-    if not os.path.exists(app.config['UPLOAD_FOLDER']):
-        os.makedirs(app.config['UPLOAD_FOLDER'])
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; production runs wsgi:app under gunicorn (see gunicorn.conf.py)
+    create_app({'DEBUG': True}).run(debug=True)
\ No newline at end of file
@@ -0,0 +1,212 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+Each worker process counts requests, latencies and database usage in memory. When
+a metrics directory is configured, every worker periodically writes its totals to
+<directory>/worker-<pid>.json and a scrape of any worker merges all of those files,
+so /metrics reports the whole server rather than whichever worker answered. Totals
+of workers that have exited are folded into archive.json (see mark_process_dead)
+so counters never go backwards when gunicorn recycles a worker.
+"""
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+HISTOGRAM_BUCKETS = {
+    'http_request_duration_seconds': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    'http_request_db_queries': (0, 1, 2, 5, 10, 20, 50, 100),
+    'http_request_db_seconds': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+}
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Time from request start until the response body was sent.'),
+    'http_request_db_queries': ('histogram', 'Database statements executed per request.'),
+    'http_request_db_seconds': ('histogram', 'Time spent in database calls per request.'),
+}
+
+ARCHIVE_FILE = 'archive.json'
+
+
+def _write_json(path, data):
+    """Writes `data` atomically so readers never see a half-written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """Thread-safe per-process counters and histograms keyed by (metric name, labels)."""
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [per-bucket counts..., +Inf count, sum]
+        self._flushed_at = time.monotonic()
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAM_BUCKETS[name]
+        key = (name, tuple(labels))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def observe_request(self, endpoint, blueprint, method, status, duration, db_queries, db_seconds):
+        """Records one finished request and flushes to the metrics directory when due."""
+        labels = (('blueprint', blueprint), ('endpoint', endpoint))
+        self.inc('http_requests_total', labels + (('method', method), ('status', str(status))))
+        self.observe('http_request_duration_seconds', labels, duration)
+        self.observe('http_request_db_queries', labels, db_queries)
+        self.observe('http_request_db_seconds', labels, db_seconds)
+        if self.directory and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        """Returns this process's totals in the JSON form written to the metrics directory."""
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self._histograms.items()],
+            }
+
+    def flush(self):
+        """Writes this process's totals to <directory>/worker-<pid>.json."""
+        self._flushed_at = time.monotonic()
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(os.path.join(self.directory, f'worker-{os.getpid()}.json'), self.snapshot())
+
+    def reset(self):
+        """Forgets everything recorded so far (e.g. what a forked worker inherited)."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+        self._flushed_at = time.monotonic()
+
+    def collect(self):
+        """
+        Returns merged (counters, histograms) for this process plus, when a directory
+        is configured, every other live worker and the archive of exited ones.
+        """
+        snapshots = [self.snapshot()]
+        if self.directory:
+            own_file = f'worker-{os.getpid()}.json'
+            paths = glob.glob(os.path.join(self.directory, 'worker-*.json'))
+            paths.append(os.path.join(self.directory, ARCHIVE_FILE))
+            for path in paths:
+                if os.path.basename(path) != own_file:
+                    snapshots.append(_read_json(path))
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text) in HELP.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            buckets = HISTOGRAM_BUCKETS[name]
+            for (metric, labels), series in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), series):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _format_value(float(bound))
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(series[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def merge_snapshots(snapshots):
+    """Sums snapshot() dicts into ({(name, labels): value}, {(name, labels): series})."""
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        if not snapshot:
+            continue
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(tuple(label) for label in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, series in snapshot.get('histograms', []):
+            key = (name, tuple(tuple(label) for label in labels))
+            if len(series) != len(HISTOGRAM_BUCKETS.get(name, ())) + 2:
+                continue  # written with different bucket bounds
+            merged = histograms.get(key)
+            histograms[key] = list(series) if merged is None else [a + b for a, b in zip(merged, series)]
+    return counters, histograms
+
+
+def _to_snapshot(counters, histograms):
+    return {
+        'counters': [[name, [list(label) for label in labels], value] for (name, labels), value in counters.items()],
+        'histograms': [[name, [list(label) for label in labels], series] for (name, labels), series in histograms.items()],
+    }
+
+
+def mark_process_dead(directory, pid):
+    """
+    Folds an exited worker's file into the archive and removes it. Meant for the
+    gunicorn master (child_exit hook), which is the only writer of the archive.
+    """
+    path = os.path.join(directory, f'worker-{pid}.json')
+    worker = _read_json(path)
+    if worker is None:
+        return
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    _write_json(archive_path, _to_snapshot(*merge_snapshots([_read_json(archive_path), worker])))
+    os.remove(path)
+
+
+def clear_directory(directory):
+    """Removes metrics left over from a previous server run."""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
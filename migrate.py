@@ -0,0 +1,229 @@
+"""
+Versioned schema migrations.
+
+Migrations are the numbered SQL files in migrations/ (NNNN_description.sql), applied
+in order. The schema_migrations table records which versions a database has, with a
+checksum of each file as it was applied.
+
+    python migrate.py status        show applied and pending migrations
+    python migrate.py up            apply pending migrations
+    python migrate.py mark 8        record versions up to 8 as applied without running
+                                    them (for databases where they were applied by hand)
+
+Statements that fail because their object already exists (table, column, index or
+foreign key) are skipped, so a migration interrupted halfway can simply be run
+again. MySQL commits DDL implicitly, so a migration is recorded only after all of
+its statements have run. Concurrent runners (several workers starting at once)
+serialize on a named lock.
+"""
+import glob
+import hashlib
+import os
+import re
+import sys
+import time
+
+import mysql.connector
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+LOCK_NAME = 'schema_migrations'
+LOCK_TIMEOUT = 300
+
+# ER_TABLE_EXISTS_ERROR, ER_DUP_FIELDNAME, ER_DUP_KEYNAME, ER_FK_DUP_NAME
+ALREADY_EXISTS_ERRORS = {1050, 1060, 1061, 1826}
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT NOT NULL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    duration_ms INT UNSIGNED NULL
+) ENGINE=InnoDB
+"""
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def read(self):
+        with open(self.path, encoding='utf-8') as f:
+            return f.read()
+
+    def checksum(self):
+        return hashlib.sha256(self.read().encode()).hexdigest()
+
+    def statements(self):
+        return split_statements(self.read())
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Returns the migrations in `directory`, ordered by version."""
+    migrations = []
+    for path in glob.glob(os.path.join(directory, '*.sql')):
+        match = MIGRATION_FILE_RE.match(os.path.basename(path))
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def split_statements(sql):
+    """
+    Splits a SQL script into statements on semicolons, ignoring semicolons inside
+    quotes and dropping -- and # comments.
+    """
+    statements, current = [], []
+    quote = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            current.append(char)
+            if char == '\\':
+                current.append(sql[i + 1:i + 2])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+            current.append(char)
+        elif sql.startswith('--', i) or char == '#':
+            end = sql.find('\n', i)
+            i = len(sql) if end == -1 else end
+            continue
+        elif char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+def applied_versions(cursor):
+    """Returns {version: checksum} for the migrations recorded in the database."""
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+
+def schema_status(conn, migrations=None):
+    """
+    Returns (current version, latest available version, pending migrations, versions
+    whose file changed since it was applied). Current version is 0 for an empty database.
+    """
+    migrations = load_migrations() if migrations is None else migrations
+    cursor = conn.cursor()
+    try:
+        applied = applied_versions(cursor)
+    finally:
+        cursor.close()
+    pending = [m for m in migrations if m.version not in applied]
+    changed = [m.version for m in migrations
+               if applied.get(m.version) not in (None, m.checksum())]
+    current = max(applied, default=0)
+    latest = migrations[-1].version if migrations else 0
+    return current, latest, pending, changed
+
+
+def apply_migration(conn, migration, log=print):
+    cursor = conn.cursor()
+    started = time.monotonic()
+    try:
+        for statement in migration.statements():
+            try:
+                cursor.execute(statement)
+                if cursor.with_rows:
+                    cursor.fetchall()
+            except mysql.connector.Error as err:
+                if err.errno not in ALREADY_EXISTS_ERRORS:
+                    raise
+                log(f"  skipped (already applied): {err.msg}")
+        conn.commit()
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+            (migration.version, migration.name, migration.checksum(), int((time.monotonic() - started) * 1000))
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def migrate(conn, target=None, log=print):
+    """Applies pending migrations up to `target` (default: all) and returns the new version."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchall()[0][0] != 1:
+        cursor.close()
+        raise RuntimeError(f"Could not take the {LOCK_NAME} lock within {LOCK_TIMEOUT}s")
+    try:
+        _, _, pending, _ = schema_status(conn)  # read under the lock: another runner may have just finished
+        for migration in pending:
+            if target is not None and migration.version > target:
+                break
+            log(f"Applying {migration.version:04d}_{migration.name}")
+            apply_migration(conn, migration, log)
+        return schema_status(conn)[0]
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+def mark_applied(conn, target):
+    """Records migrations up to `target` as applied without running them."""
+    cursor = conn.cursor()
+    try:
+        applied = applied_versions(cursor)
+        for migration in load_migrations():
+            if migration.version <= target and migration.version not in applied:
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (migration.version, migration.name, migration.checksum())
+                )
+                print(f"Marked {migration.version:04d}_{migration.name} as applied")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'status'
+    if command not in ('status', 'up', 'mark') or (command == 'mark' and len(argv) != 2):
+        print(__doc__)
+        return 2
+
+    from main_app import load_config
+    config = load_config()
+    conn = mysql.connector.connect(host=config['DB_HOST'], user=config['DB_USER'],
+                                   password=config['DB_PASSWORD'], database=config['DB_NAME'])
+    try:
+        if command == 'up':
+            target = int(argv[1]) if len(argv) > 1 else None
+            print(f"Schema is at version {migrate(conn, target)}")
+        elif command == 'mark':
+            mark_applied(conn, int(argv[1]))
+        else:
+            current, latest, pending, changed = schema_status(conn)
+            print(f"Schema version {current} (latest available {latest})")
+            for migration in pending:
+                print(f"  pending  {migration.version:04d}_{migration.name}")
+            for version in changed:
+                print(f"  changed since applied: {version:04d}")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
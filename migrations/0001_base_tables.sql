@@ -0,0 +1,63 @@
+-- The tables as the application first used them. Later migrations add to them.
+-- On a database that already has these tables every statement is a no-op.
+CREATE TABLE IF NOT EXISTS users (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    user_type VARCHAR(32) NOT NULL,
+    user_name VARCHAR(100) NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    consultant_type VARCHAR(64) NULL,
+    reporting_manager VARCHAR(100) NULL,
+    alternate_mobile VARCHAR(32) NULL,
+    worksnap_credentials VARCHAR(255) NULL,
+    status VARCHAR(32) NULL,
+    timesheet_notification VARCHAR(32) NULL,
+    name VARCHAR(255) NOT NULL,
+    mobile VARCHAR(32) NULL,
+    office_email VARCHAR(255) NULL,
+    joining_date DATE NULL,
+    position VARCHAR(64) NULL,
+    date_of_birth DATE NULL,
+    anniversary_date DATE NULL,
+    sap_server_credentials VARCHAR(255) NULL,
+    allow_backdated_timesheet VARCHAR(32) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS tickets (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    ticket_number VARCHAR(32) NOT NULL,
+    customer VARCHAR(64) NULL,
+    module VARCHAR(64) NULL,
+    status VARCHAR(32) NULL,
+    form_type VARCHAR(64) NULL,
+    priority VARCHAR(16) NULL,
+    subject VARCHAR(255) NULL,
+    task_given_by VARCHAR(255) NULL,
+    approved_hours VARCHAR(16) NULL,
+    description TEXT NULL,
+    attachment_path VARCHAR(512) NULL,
+    assigned_to_user_name VARCHAR(1024) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS attendance (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    date DATE NOT NULL,
+    check_in DATETIME NULL,
+    check_out DATETIME NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS holidays (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    country VARCHAR(100) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    holiday_date DATE NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS leave_requests (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    consultant_name VARCHAR(255) NOT NULL,
+    leave_date DATE NOT NULL,
+    leave_type VARCHAR(32) NOT NULL,
+    remarks TEXT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,7 @@
+-- Creation timestamps for tickets, used by the weekly counts in the dashboard summary.
+-- One clause per statement so the runner can skip whichever part already exists.
+-- Existing tickets keep created_at NULL (their creation time is unknown) and so stay
+-- out of the weekly counts; only tickets inserted afterwards get the current time.
+ALTER TABLE tickets ADD COLUMN created_at TIMESTAMP NULL DEFAULT NULL;
+ALTER TABLE tickets MODIFY COLUMN created_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE tickets ADD INDEX idx_tickets_created_at (created_at);
@@ -0,0 +1,23 @@
+-- Named counters used for O(1) number allocation (see allocate_ticket_number).
+-- The ticket_number row is seeded automatically from MAX(ticket_number) on first use.
+CREATE TABLE IF NOT EXISTS counters (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    value BIGINT UNSIGNED NOT NULL
+) ENGINE=InnoDB;
+
+-- Duplicate numbers handed out by the old MAX()+1 scheme are renumbered first: the
+-- oldest ticket (lowest id) keeps the number, the others get fresh numbers after the
+-- highest one, in id order. Run this to see which tickets will change:
+--   SELECT ticket_number, GROUP_CONCAT(id ORDER BY id) FROM tickets GROUP BY ticket_number HAVING COUNT(*) > 1;
+UPDATE tickets t
+JOIN (
+    SELECT d.id, ROW_NUMBER() OVER (ORDER BY d.id) AS n
+    FROM tickets d
+    JOIN (SELECT ticket_number, MIN(id) AS keep_id FROM tickets GROUP BY ticket_number HAVING COUNT(*) > 1) k
+        ON k.ticket_number = d.ticket_number AND d.id <> k.keep_id
+) r ON r.id = t.id
+CROSS JOIN (SELECT COALESCE(MAX(CAST(ticket_number AS UNSIGNED)), 0) AS top FROM tickets) m
+SET t.ticket_number = m.top + r.n;
+
+-- Guards against duplicate numbers from now on
+ALTER TABLE tickets ADD UNIQUE INDEX uq_tickets_ticket_number (ticket_number);
@@ -0,0 +1,8 @@
+-- Metadata for content-addressed attachments (see attachments.py).
+-- attachment_path points at uploads/objects/<aa>/<bb>/<sha256>; attachment_name keeps
+-- the uploaded filename. Rows written before this change keep their old path and NULLs here.
+-- One clause per statement so the runner can skip whichever part already exists.
+ALTER TABLE tickets ADD COLUMN attachment_name VARCHAR(255) NULL AFTER attachment_path;
+ALTER TABLE tickets ADD COLUMN attachment_size BIGINT UNSIGNED NULL AFTER attachment_name;
+ALTER TABLE tickets ADD COLUMN attachment_sha256 CHAR(64) NULL AFTER attachment_size;
+ALTER TABLE tickets ADD INDEX idx_tickets_attachment_sha256 (attachment_sha256);
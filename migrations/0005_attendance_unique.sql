@@ -0,0 +1,20 @@
+-- One attendance row per user per day; check_in/check_out rely on this key for
+-- their INSERT ... ON DUPLICATE KEY UPDATE upsert.
+-- Double check-ins made before this key existed are merged first: the oldest row
+-- (lowest id) gets the earliest check-in and latest check-out of its day, the
+-- others are deleted. To see them beforehand:
+--   SELECT user_id, date, COUNT(*) FROM attendance GROUP BY user_id, date HAVING COUNT(*) > 1;
+UPDATE attendance a
+JOIN (
+    SELECT MIN(id) AS keep_id, MIN(check_in) AS check_in, MAX(check_out) AS check_out
+    FROM attendance GROUP BY user_id, date HAVING COUNT(*) > 1
+) d ON d.keep_id = a.id
+SET a.check_in = d.check_in, a.check_out = d.check_out;
+
+DELETE a FROM attendance a
+JOIN (
+    SELECT user_id, date, MIN(id) AS keep_id
+    FROM attendance GROUP BY user_id, date HAVING COUNT(*) > 1
+) d ON d.user_id = a.user_id AND d.date = a.date AND a.id <> d.keep_id;
+
+ALTER TABLE attendance ADD UNIQUE KEY uq_attendance_user_date (user_id, date);
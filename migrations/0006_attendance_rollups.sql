@@ -0,0 +1,31 @@
+-- Per-user monthly attendance totals for the timesheet report (/attendance/report).
+-- check_in adds to days_present/late_days and check_out adds to days_checked_out and
+-- worked_seconds, in the same transaction as the attendance write.
+CREATE TABLE IF NOT EXISTS attendance_monthly (
+    user_id INT NOT NULL,
+    month DATE NOT NULL,  -- first day of the month
+    days_present SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+    days_checked_out SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+    late_days SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+    worked_seconds INT UNSIGNED NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month),
+    KEY idx_attendance_monthly_month (month)
+) ENGINE=InnoDB;
+
+-- Backfill from existing attendance rows (late = checked in after 09:30, matching
+-- the default ATTENDANCE_LATE_AFTER). Existing rollup rows are recomputed, so the
+-- statement is safe to run again.
+INSERT INTO attendance_monthly (user_id, month, days_present, days_checked_out, late_days, worked_seconds)
+SELECT user_id,
+       DATE_FORMAT(date, '%Y-%m-01'),
+       SUM(check_in IS NOT NULL),
+       SUM(check_in IS NOT NULL AND check_out IS NOT NULL),
+       SUM(TIME(check_in) > '09:30:00'),
+       COALESCE(SUM(TIMESTAMPDIFF(SECOND, check_in, check_out)), 0)
+FROM attendance
+GROUP BY user_id, DATE_FORMAT(date, '%Y-%m-01')
+ON DUPLICATE KEY UPDATE
+    days_present = VALUES(days_present),
+    days_checked_out = VALUES(days_checked_out),
+    late_days = VALUES(late_days),
+    worked_seconds = VALUES(worked_seconds);
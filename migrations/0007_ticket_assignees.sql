@@ -0,0 +1,20 @@
+-- Normalized ticket assignment: one row per (ticket, assignee). The primary key
+-- serves per-ticket lookups; idx_ticket_assignees_user serves the "my tickets"
+-- query (WHERE user_id = ? ORDER BY ticket_id DESC). tickets.assigned_to_user_name
+-- is kept as a denormalized display string rewritten on every assignment.
+CREATE TABLE IF NOT EXISTS ticket_assignees (
+    ticket_id INT NOT NULL,
+    user_id INT NOT NULL,
+    assigned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ticket_id, user_id),
+    KEY idx_ticket_assignees_user (user_id, ticket_id),
+    CONSTRAINT fk_ticket_assignees_ticket FOREIGN KEY (ticket_id) REFERENCES tickets (id) ON DELETE CASCADE,
+    CONSTRAINT fk_ticket_assignees_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- Backfill from the comma-separated display column
+INSERT IGNORE INTO ticket_assignees (ticket_id, user_id)
+SELECT t.id, u.id
+FROM tickets t
+JOIN users u ON FIND_IN_SET(u.name, REPLACE(t.assigned_to_user_name, ', ', ',')) > 0
+WHERE t.assigned_to_user_name IS NOT NULL AND t.assigned_to_user_name <> '';
@@ -0,0 +1,4 @@
+-- Full-text index behind /tickets/api/search (TICKET_SEARCH_BACKEND = 'fulltext').
+-- InnoDB builds it online; on large tables run it outside business hours anyway,
+-- as the first FULLTEXT index on a table rebuilds it to add FTS_DOC_ID.
+ALTER TABLE tickets ADD FULLTEXT INDEX ft_tickets_subject_description (subject, description);
@@ -0,0 +1,22 @@
+-- Composite indexes for the hot query shapes. ALGORITHM=INPLACE, LOCK=NONE builds
+-- them online: reads and writes continue, and MySQL refuses the statement rather
+-- than silently locking the table if it cannot build the index that way.
+-- attendance(user_id, date) is already covered by uq_attendance_user_date (0005).
+
+-- assign_tickets: WHERE status = ? ORDER BY ticket_number
+ALTER TABLE tickets ADD INDEX idx_tickets_status_number (status, ticket_number), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- leave_list: ORDER BY leave_date DESC, created_at DESC (and date range filters)
+ALTER TABLE leave_requests ADD INDEX idx_leave_requests_date_created (leave_date, created_at), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- holiday calendar load and date range filters
+ALTER TABLE holidays ADD INDEX idx_holidays_date (holiday_date), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- managers dropdown: WHERE position IN (...) ORDER BY name
+ALTER TABLE users ADD INDEX idx_users_position_name (position, name), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- customers/assignees dropdowns: WHERE user_type IN (...) ORDER BY name
+ALTER TABLE users ADD INDEX idx_users_type_name (user_type, name), ALGORITHM=INPLACE, LOCK=NONE;
+
+-- login: WHERE user_name = ?
+ALTER TABLE users ADD INDEX idx_users_user_name (user_name), ALGORITHM=INPLACE, LOCK=NONE;
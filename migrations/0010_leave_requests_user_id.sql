@@ -0,0 +1,13 @@
+-- Link leave requests to the user they belong to. consultant_name stays as typed;
+-- user_id is resolved from it when the request is written, so the attendance report
+-- keeps matching leave after a user is renamed and never mixes up two users with
+-- the same name (an ambiguous or unknown name is left unlinked).
+ALTER TABLE leave_requests ADD COLUMN user_id INT NULL;
+ALTER TABLE leave_requests ADD INDEX idx_leave_requests_user_date (user_id, leave_date);
+ALTER TABLE leave_requests ADD CONSTRAINT fk_leave_requests_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE SET NULL;
+
+-- Backfill the existing rows whose name matches exactly one user
+UPDATE leave_requests l
+JOIN (SELECT name, MIN(id) AS id FROM users GROUP BY name HAVING COUNT(*) = 1) u ON u.name = l.consultant_name
+SET l.user_id = u.id
+WHERE l.user_id IS NULL;
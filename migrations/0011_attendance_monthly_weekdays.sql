@@ -0,0 +1,14 @@
+-- Weekday check-ins per user and month, so the timesheet report can count attendance
+-- on working days from the rollup. Holidays and leave can be added after the fact, so
+-- they are not rolled up; the report subtracts the few check-ins on those days.
+ALTER TABLE attendance_monthly ADD COLUMN weekday_days SMALLINT UNSIGNED NOT NULL DEFAULT 0;
+
+-- Backfill from existing attendance rows; safe to run again
+UPDATE attendance_monthly m
+JOIN (
+    SELECT user_id, DATE_FORMAT(date, '%Y-%m-01') AS month, COUNT(*) AS days
+    FROM attendance
+    WHERE check_in IS NOT NULL AND WEEKDAY(date) < 5
+    GROUP BY user_id, DATE_FORMAT(date, '%Y-%m-01')
+) a ON a.user_id = m.user_id AND a.month = m.month
+SET m.weekday_days = a.days;
@@ -0,0 +1,113 @@
+from datetime import date
+
+import main_app
+from main_app import HolidayCalendar, TTLCache, table_versions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_get_and_set():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+
+def test_ttl_cache_entries_expire(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(main_app.time, 'monotonic', clock)
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set('a', 1)
+    clock.now += 59
+    assert cache.get('a') == 1
+    clock.now += 2
+    assert cache.get('a') is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.pop('a')
+    cache.pop('missing')
+    assert cache.get('a') is None
+    cache.clear()
+    assert cache.get('b') is None
+
+
+class StaticHolidayCalendar(HolidayCalendar):
+    """A HolidayCalendar fed from a list instead of the holidays table."""
+
+    def __init__(self, dates, ttl=60):
+        super().__init__(ttl)
+        self.dates = dates
+        self.loads = 0
+
+    def _load(self):
+        self.loads += 1
+        holidays = [{'name': f'H{i}', 'holiday_date': d} for i, d in enumerate(sorted(self.dates))]
+        return [h['holiday_date'].toordinal() for h in holidays], holidays
+
+
+HOLIDAYS = [date(2024, 1, 1), date(2024, 3, 29), date(2024, 4, 1), date(2024, 12, 25)]
+
+
+def between(calendar, start, end):
+    return [h['holiday_date'] for h in calendar.between(start, end)]
+
+
+def test_holiday_range_is_inclusive():
+    calendar = StaticHolidayCalendar(HOLIDAYS)
+    assert between(calendar, date(2024, 3, 29), date(2024, 4, 1)) == [date(2024, 3, 29), date(2024, 4, 1)]
+    assert between(calendar, date(2024, 1, 1), date(2024, 1, 1)) == [date(2024, 1, 1)]
+
+
+def test_holiday_range_between_holidays_is_empty():
+    calendar = StaticHolidayCalendar(HOLIDAYS)
+    assert between(calendar, date(2024, 4, 2), date(2024, 12, 24)) == []
+    assert between(calendar, date(2025, 1, 1), date(2025, 12, 31)) == []
+
+
+def test_holiday_range_open_bounds():
+    calendar = StaticHolidayCalendar(HOLIDAYS)
+    assert between(calendar, None, None) == HOLIDAYS
+    assert between(calendar, date(2024, 4, 1), None) == [date(2024, 4, 1), date(2024, 12, 25)]
+    assert between(calendar, None, date(2024, 3, 31)) == [date(2024, 1, 1), date(2024, 3, 29)]
+
+
+def test_holiday_calendar_reloads_when_table_version_changes():
+    calendar = StaticHolidayCalendar(HOLIDAYS)
+    calendar.between()
+    calendar.between()
+    assert calendar.loads == 1
+    calendar.dates = HOLIDAYS + [date(2024, 5, 1)]
+    table_versions.bump('holidays')
+    assert date(2024, 5, 1) in between(calendar, None, None)
+    assert calendar.loads == 2
+
+
+def test_holiday_calendar_reloads_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(main_app.time, 'monotonic', clock)
+    calendar = StaticHolidayCalendar(HOLIDAYS, ttl=60)
+    calendar.between()
+    clock.now += 61
+    calendar.between()
+    assert calendar.loads == 2
@@ -0,0 +1,98 @@
+import gzip
+
+import pytest
+from flask import Response
+from werkzeug.datastructures import Accept
+
+from compression import compress_response
+
+MIMETYPES = {'text/html': (6, 5), 'application/json': (6, 5)}
+BODY = b'<p>ticket</p>' * 200
+GZIP = Accept([('gzip', 1)])
+
+
+def compress(response, accept=GZIP, min_size=500, flush_size=4096, buffer_limit=64 * 1024):
+    return compress_response(response, accept, MIMETYPES, min_size, flush_size, buffer_limit)
+
+
+def test_compresses_listed_mimetype():
+    response = compress(Response(BODY, mimetype='text/html'))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(response.get_data()) == BODY
+
+
+def test_strong_etag_becomes_weak():
+    response = Response(BODY, mimetype='text/html')
+    response.set_etag('abc')
+    compress(response)
+    assert response.get_etag() == ('abc', True)
+
+
+def test_skips_unlisted_mimetype():
+    response = compress(Response(BODY, mimetype='image/png'))
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == BODY
+
+
+def test_skips_small_body():
+    response = compress(Response(BODY[:100], mimetype='text/html'))
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('status', [101, 204, 206, 304])
+def test_skips_status(status):
+    response = compress(Response(BODY, status=status, mimetype='text/html'))
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('header, value', [('Content-Encoding', 'br'), ('Content-Range', 'bytes 0-9/100')])
+def test_skips_already_encoded_or_partial(header, value):
+    response = Response(BODY, mimetype='text/html')
+    response.headers[header] = value
+    compress(response)
+    assert response.get_data() == BODY
+
+
+def test_skips_no_transform():
+    response = Response(BODY, mimetype='text/html')
+    response.cache_control.no_transform = True
+    compress(response)
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_skips_direct_passthrough():
+    response = Response(BODY, mimetype='text/html')
+    response.direct_passthrough = True
+    compress(response)
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_no_acceptable_encoding_still_varies():
+    response = compress(Response(BODY, mimetype='text/html'), accept=Accept([('identity', 1)]))
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_data() == BODY
+
+
+def test_gzip_refused_with_zero_quality():
+    response = compress(Response(BODY, mimetype='text/html'), accept=Accept([('gzip', 0), ('*', 1)]))
+    assert response.headers.get('Content-Encoding') != 'gzip'
+
+
+def test_large_buffered_body_is_compressed_while_sent():
+    response = compress(Response(BODY * 10, mimetype='text/html'), buffer_limit=1024)
+    assert response.is_streamed
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(b''.join(response.response)) == BODY * 10
+
+
+def test_streamed_body_is_compressed_in_chunks():
+    def generate():
+        for _ in range(20):
+            yield BODY
+
+    response = compress(Response(generate(), mimetype='text/html'))
+    chunks = list(response.response)
+    assert len(chunks) > 2  # sync-flushed along the way, not one block at the end
+    assert gzip.decompress(b''.join(chunks)) == BODY * 20
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+
+import pytest
+
+from main_app import decode_page_cursor, encode_page_cursor, import_cell, import_date, import_value
+
+
+def test_import_cell_blank_is_none():
+    row = {'a': '  ', 'b': None, 'c': ' x '}
+    assert import_cell(row, 'a') is None
+    assert import_cell(row, 'b') is None
+    assert import_cell(row, 'missing') is None
+    assert import_cell(row, 'c') == 'x'
+
+
+def test_import_cell_required():
+    with pytest.raises(ValueError, match="'a' is required"):
+        import_cell({'a': ''}, 'a', required=True)
+
+
+def test_import_value_returns_text():
+    row = {'password': 123456.0, 'code': 42, 'ratio': 1.5, 'name': ' Alice '}
+    assert import_value(row, 'password') == '123456'
+    assert import_value(row, 'code') == '42'
+    assert import_value(row, 'ratio') == '1.5'
+    assert import_value(row, 'name') == 'Alice'
+    assert import_value(row, 'missing') is None
+
+
+def test_import_value_required():
+    with pytest.raises(ValueError, match="'name' is required"):
+        import_value({'name': None}, 'name', required=True)
+
+
+def test_import_date_accepts_text_and_spreadsheet_dates():
+    row = {'csv': '2024-03-29', 'xlsx': datetime(2024, 3, 29, 0, 0), 'typed': date(2024, 3, 29)}
+    assert import_date(row, 'csv') == date(2024, 3, 29)
+    assert import_date(row, 'xlsx') == date(2024, 3, 29)
+    assert import_date(row, 'typed') == date(2024, 3, 29)
+    assert import_date(row, 'missing') is None
+
+
+@pytest.mark.parametrize('value', ['29/03/2024', '2024-02-30', 45380])
+def test_import_date_rejects_other_values(value):
+    with pytest.raises(ValueError, match="'day' must be a date"):
+        import_date({'day': value}, 'day')
+
+
+def test_import_date_required():
+    with pytest.raises(ValueError, match="'day' is required"):
+        import_date({'day': ' '}, 'day', required=True)
+
+
+def test_page_cursor_round_trip():
+    token = encode_page_cursor(['TKT-0042', 42])
+    assert '/' not in token and '+' not in token
+    assert decode_page_cursor(token) == ['TKT-0042', 42]
+
+
+def test_page_cursor_encodes_dates_as_text():
+    assert decode_page_cursor(encode_page_cursor([date(2024, 3, 29), 7])) == ['2024-03-29', 7]
+
+
+@pytest.mark.parametrize('token', ['not base64!', encode_page_cursor([1, 2])[:-4], encode_page_cursor([1]),
+                                   encode_page_cursor({'id': 1}), ''])
+def test_page_cursor_rejects_malformed_tokens(token):
+    with pytest.raises(ValueError):
+        decode_page_cursor(token)
@@ -0,0 +1,48 @@
+from migrate import load_migrations, split_statements
+
+
+def test_splits_on_semicolons():
+    assert split_statements("CREATE TABLE a (id INT); DROP TABLE b;\n") == [
+        "CREATE TABLE a (id INT)",
+        "DROP TABLE b",
+    ]
+
+
+def test_last_statement_needs_no_semicolon():
+    assert split_statements("SELECT 1;\nSELECT 2") == ["SELECT 1", "SELECT 2"]
+
+
+def test_ignores_semicolons_inside_quotes():
+    sql = "INSERT INTO t VALUES ('a;b', \"c;d\"); ALTER TABLE `x;y` ADD c INT"
+    assert split_statements(sql) == [
+        "INSERT INTO t VALUES ('a;b', \"c;d\")",
+        "ALTER TABLE `x;y` ADD c INT",
+    ]
+
+
+def test_escaped_quote_does_not_end_string():
+    sql = r"INSERT INTO t VALUES ('it\'s; fine'); SELECT 1"
+    assert split_statements(sql) == [r"INSERT INTO t VALUES ('it\'s; fine')", "SELECT 1"]
+
+
+def test_drops_comments():
+    sql = "-- header; not a statement\nSELECT 1; # trailing; comment\n# whole line\nSELECT 2 -- done"
+    assert split_statements(sql) == ["SELECT 1", "SELECT 2"]
+
+
+def test_comment_markers_inside_quotes_are_kept():
+    assert split_statements("SELECT '-- x', '# y'") == ["SELECT '-- x', '# y'"]
+
+
+def test_empty_statements_are_dropped():
+    assert split_statements(" ;;\n-- only a comment\n;") == []
+
+
+def test_bundled_migrations_split_into_statements():
+    migrations = load_migrations()
+    assert [m.version for m in migrations] == list(range(1, len(migrations) + 1))
+    for migration in migrations:
+        statements = migration.statements()
+        assert statements, migration.path
+        for statement in statements:
+            assert not statement.startswith(('--', '#')), migration.path
@@ -0,0 +1,11 @@
+"""
+WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Configuration comes from the file named by TICKETING_CONFIG and TICKETING_*
+environment variables; see create_app() in main_app.
+"""
+from main_app import create_app
+
+app = create_app()